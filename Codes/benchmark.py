@@ -0,0 +1,259 @@
+# File: benchmark.py
+
+# Reproducible throughput benchmarks for the simulation, the network and the GA, e.g.
+#   python benchmark.py --save baseline.json           # record a baseline
+#   python benchmark.py --compare baseline.json        # exit code 1 if anything got slower
+# Every scenario uses fixed seeds, so runs differ only by the speed of the code and machine.
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import numpy as np
+from neural_network import NeuralNetwork, initialize_genomes, genome_size
+from genetic_algorithm import GeneticAlgorithmManager
+from simulation import Simulation
+from termination import TerminationPolicy
+from config import (BLOCK_SIZE, GRID_WIDTH, GRID_HEIGHT, INPUT_NEURONS, HIDDEN_NEURONS, OUTPUT_NEURONS,
+                    CLOCKWISE_DIRECTIONS, TURN_TABLE, NN_DTYPE)
+
+SEED = 1234
+POPULATION_SIZES = [20, 200, 2000, 10000]
+PERCENTILES = [50, 90, 99]
+
+def seed_everything(seed=SEED):
+    random.seed(seed)
+    np.random.seed(seed)
+    return np.random.default_rng(seed)
+
+def random_network(rng):
+    nn_model = NeuralNetwork(INPUT_NEURONS, HIDDEN_NEURONS, OUTPUT_NEURONS)
+    genome = np.zeros(genome_size(), dtype=NN_DTYPE)
+    initialize_genomes(genome[np.newaxis, :], rng)
+    nn_model.set_flat_weights(genome)
+    return nn_model
+
+def measure(run_sample, samples, unit):
+    # run_sample() does one sample of work and returns how many units it did
+    sample_seconds = []
+    total_units = 0
+    for _ in range(samples):
+        start = time.perf_counter()
+        total_units += run_sample()
+        sample_seconds.append(time.perf_counter() - start)
+    result = {'unit': unit, 'throughput': total_units / sum(sample_seconds), 'samples': samples}
+    for percentile, value in zip(PERCENTILES, np.percentile(sample_seconds, PERCENTILES)):
+        result[f'p{percentile}_seconds'] = value.item()
+    return result
+
+
+# --- Long snakes: a scripted policy that follows a Hamiltonian cycle never dies and can be made
+# as long as needed, so the per-tick cost of a long body can be measured ---
+
+def _hamiltonian_cycle():
+    # Row 0 left to right, then rows 1.. snaking through columns 1..W-1, back up column 0
+    # (needs an even GRID_HEIGHT)
+    cells = [(x, 0) for x in range(GRID_WIDTH)]
+    for y in range(1, GRID_HEIGHT):
+        columns = range(GRID_WIDTH - 1, 0, -1) if y % 2 else range(1, GRID_WIDTH)
+        cells.extend((x, y) for x in columns)
+    cells.extend((0, y) for y in range(GRID_HEIGHT - 1, 0, -1))
+    cells = [(x * BLOCK_SIZE, y * BLOCK_SIZE) for x, y in cells]
+    following = {cell: cells[(i + 1) % len(cells)] for i, cell in enumerate(cells)}
+    previous = {cell: cells[i - 1] for i, cell in enumerate(cells)}
+    return following, previous
+
+NEXT_CELL, PREVIOUS_CELL = _hamiltonian_cycle()
+
+
+class CyclePolicy:
+    # Stands in for the network (same forward interface): always steers to the next cell of the cycle
+    def __init__(self):
+        self.snake = None
+        self.outputs = np.zeros((1, 3))
+
+    def forward(self, inputs):
+        head_x, head_y = self.snake.body[0]
+        next_x, next_y = NEXT_CELL[(head_x, head_y)]
+        wanted = CLOCKWISE_DIRECTIONS.index(((next_x - head_x) // BLOCK_SIZE, (next_y - head_y) // BLOCK_SIZE))
+        self.outputs[:] = 0
+        self.outputs[0, TURN_TABLE[self.snake.direction_index].index(wanted)] = 1
+        return self.outputs
+
+
+def long_snake_simulation(length, rng):
+    policy = CyclePolicy()
+    game_sim = Simulation(mode='ai_watch', nn_model=policy, termination=TerminationPolicy(), rng=rng)
+    snake = policy.snake = game_sim.ai_snake
+    # Grow the body backwards along the cycle, then put the food somewhere free again
+    while len(snake.body) < length:
+        cell = PREVIOUS_CELL[snake.body[-1]]
+        snake.body.append(cell)
+        game_sim.board.add(cell)
+    game_sim._spawn_food()
+    return game_sim
+
+
+# --- Scenarios: each returns a measure() result ---
+
+def bench_game_ticks(samples, ticks_per_sample=2000):
+    # Headless single-snake games with a random network (what 'game' evaluation does)
+    rng = seed_everything()
+    nn_model = random_network(rng)
+
+    def run_sample():
+        ticks = 0
+        while ticks < ticks_per_sample:
+            game_sim = Simulation(mode='ai_watch', nn_model=nn_model, random_start=True,
+                                  termination=TerminationPolicy(), rng=rng)
+            game_sim.run()
+            ticks += game_sim.ticks
+        return ticks
+    return measure(run_sample, samples, 'ticks')
+
+def bench_long_snake_ticks(samples, length=300, ticks_per_sample=2000):
+    rng = seed_everything()
+
+    def run_sample():
+        game_sim = long_snake_simulation(length, rng)
+        for _ in range(ticks_per_sample):
+            game_sim.step()
+        return game_sim.ticks
+    return measure(run_sample, samples, 'ticks')
+
+def bench_vs_ai_ticks(samples, ticks_per_sample=2000):
+    # Both snakes of a 'human_vs_ai' game; the "human" is steered by a second random network
+    rng = seed_everything()
+    nn_model = random_network(rng)
+    opponent = random_network(rng)
+
+    def run_sample():
+        ticks = 0
+        while ticks < ticks_per_sample:
+            game_sim = Simulation(mode='human_vs_ai', nn_model=nn_model, rng=rng)
+            while not game_sim.game_over:
+                human = game_sim.human_snake
+                inputs = human.get_state_for_nn(game_sim.food.get_pos())
+                human.turn(np.argmax(opponent.forward(inputs)[0]))
+                game_sim.step()
+            ticks += game_sim.ticks
+        return ticks
+    return measure(run_sample, samples, 'ticks')
+
+def bench_forward(samples, calls_per_sample=10000, quantized=False):
+    rng = seed_everything()
+    nn_model = random_network(rng)
+    if quantized:
+        nn_model = nn_model.quantize()
+    inputs = rng.integers(0, 2, size=(1, INPUT_NEURONS)).astype(NN_DTYPE)
+
+    def run_sample():
+        for _ in range(calls_per_sample):
+            nn_model.forward(inputs)
+        return calls_per_sample
+    return measure(run_sample, samples, 'calls')
+
+def bench_mutate(samples, calls_per_sample=2000):
+    with tempfile.TemporaryDirectory() as directory:
+        seed_everything()
+        with GeneticAlgorithmManager(seed=SEED, verbose=False, best_nn_file=os.path.join(directory, 'best.snn')) as ga_manager:
+            nn_model = ga_manager.population[0]
+
+            def run_sample():
+                for _ in range(calls_per_sample):
+                    ga_manager._mutate(nn_model)
+                return calls_per_sample
+            return measure(run_sample, samples, 'calls')
+
+def bench_generation(samples, population_size):
+    # Full generations (vector simulator, serial evaluation); throughput is in evaluated genomes
+    with tempfile.TemporaryDirectory() as directory:
+        seed_everything()
+        with GeneticAlgorithmManager(population_size=population_size, seed=SEED, verbose=False,
+                                     best_nn_file=os.path.join(directory, 'best.snn')) as ga_manager:
+            def run_sample():
+                return ga_manager.run_generation()['evaluations']
+            return measure(run_sample, samples, 'evaluations')
+
+def scenarios(population_sizes):
+    # name -> function(samples) -> result
+    table = {
+        'game_ticks': bench_game_ticks,
+        'long_snake_ticks': bench_long_snake_ticks,
+        'vs_ai_ticks': bench_vs_ai_ticks,
+        'forward': bench_forward,
+        'forward_int8': lambda samples: bench_forward(samples, quantized=True),
+        'mutate': bench_mutate,
+    }
+    for population_size in population_sizes:
+        table[f'generation_p{population_size}'] = lambda samples, size=population_size: bench_generation(samples, size)
+    return table
+
+
+# --- Reports and baselines ---
+
+def run_benchmarks(selected, samples, population_sizes):
+    results = {}
+    for name, bench in scenarios(population_sizes).items():
+        if selected and not any(pattern in name for pattern in selected):
+            continue
+        results[name] = bench(samples)
+        print(f"{name:<22} {results[name]['throughput']:>14.1f} {results[name]['unit']}/s   "
+              f"p50 {results[name]['p50_seconds']:.4f}s  p99 {results[name]['p99_seconds']:.4f}s", flush=True)
+    return {
+        'meta': {'seed': SEED, 'samples': samples, 'python': platform.python_version(),
+                 'numpy': np.__version__, 'machine': platform.machine(), 'processor': platform.processor()},
+        'results': results,
+    }
+
+def compare(report, baseline, tolerance):
+    # Prints current vs baseline throughput; returns the names that got slower than the tolerance allows
+    regressions = []
+    print(f"\n{'scenario':<22} {'baseline':>14} {'current':>14} {'change':>8}")
+    for name, result in report['results'].items():
+        if name not in baseline['results']:
+            continue
+        before = baseline['results'][name]['throughput']
+        change = result['throughput'] / before - 1
+        flag = ""
+        if change < -tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<22} {before:>14.1f} {result['throughput']:>14.1f} {change:>+8.1%}{flag}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark simulation, inference and evolution throughput.")
+    parser.add_argument('scenarios', nargs='*', help="only run scenarios whose name contains one of these")
+    parser.add_argument('--samples', type=int, default=None, help="samples per scenario (default: 10, 3 with --quick)")
+    parser.add_argument('--quick', action='store_true', help="fewer samples and only small populations")
+    parser.add_argument('--populations', type=int, nargs='+', default=None,
+                        help=f"population sizes for the generation scenarios (default: {POPULATION_SIZES})")
+    parser.add_argument('--save', help="write the results to this JSON file (a baseline)")
+    parser.add_argument('--compare', help="baseline JSON file to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help="allowed throughput drop before --compare fails (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    samples = args.samples or (3 if args.quick else 10)
+    population_sizes = args.populations or (POPULATION_SIZES[:2] if args.quick else POPULATION_SIZES)
+    report = run_benchmarks(args.scenarios, samples, population_sizes)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\nSlower than the baseline: {', '.join(regressions)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+# File: board.py
+
+import numpy as np
+from termination import CELL_KEY_LIST
+# Import settings from config.py
+from config import BLOCK_SIZE, SCREEN_WIDTH, SCREEN_HEIGHT, GRID_WIDTH, GRID_HEIGHT
+
+class Board:
+    # Occupancy grid shared by every snake in a game.
+    # Each cell holds how many body segments are on it, so lookups are O(1) and
+    # snakes only touch the cells their head and tail move through.
+    # Free cells are also kept in a swap-remove list, so a random free cell is an O(1) pick.
+    # rng (np.random.Generator) picks the food cells; pass a seeded one for reproducible games.
+    def __init__(self, rng=None):
+        self.rng = rng if rng is not None else np.random.default_rng()
+        num_cells = GRID_WIDTH * GRID_HEIGHT
+        self.cells = bytearray(num_cells)
+        self.grid = np.frombuffer(self.cells, dtype=np.uint8) # NumPy view of cells (shared memory, no copy)
+        self.free_cells = list(range(num_cells)) # Indices of empty cells, in no particular order
+        self.free_slot = list(range(num_cells)) # Cell index -> its slot in free_cells
+        self.hash = 0 # Zobrist hash of the set of occupied cells (used for loop detection)
+
+    @property
+    def occupied_count(self):
+        # Number of cells with at least one segment
+        return len(self.cells) - len(self.free_cells)
+
+    @staticmethod
+    def is_inside(pos):
+        return 0 <= pos[0] < SCREEN_WIDTH and 0 <= pos[1] < SCREEN_HEIGHT
+
+    @staticmethod
+    def cell_index(pos):
+        # Pixel position -> index in self.cells (position must be inside the board)
+        return (pos[1] // BLOCK_SIZE) * GRID_WIDTH + pos[0] // BLOCK_SIZE
+
+    def count(self, pos):
+        # Segments on this cell (0 for positions outside the board)
+        if not self.is_inside(pos):
+            return 0
+        return self.cells[self.cell_index(pos)]
+
+    def count_at(self, x, y):
+        # Same as count((x, y)) without the bounds check, for callers that already did it
+        return self.cells[(y // BLOCK_SIZE) * GRID_WIDTH + x // BLOCK_SIZE]
+
+    def is_occupied(self, pos):
+        return self.count(pos) > 0
+
+    def add(self, pos):
+        # Positions outside the board (a head that just hit a wall) are not tracked
+        if not self.is_inside(pos):
+            return
+        index = self.cell_index(pos)
+        if self.cells[index] == 0:
+            self._take_free_cell(index)
+        self.cells[index] += 1
+
+    def remove(self, pos):
+        if not self.is_inside(pos):
+            return
+        index = self.cell_index(pos)
+        self.cells[index] -= 1
+        if self.cells[index] == 0:
+            self._release_free_cell(index)
+
+    def _take_free_cell(self, index):
+        # Swap-remove: move the last free cell into this cell's slot
+        self.hash ^= CELL_KEY_LIST[index]
+        slot = self.free_slot[index]
+        last = self.free_cells.pop()
+        if last != index:
+            self.free_cells[slot] = last
+            self.free_slot[last] = slot
+
+    def _release_free_cell(self, index):
+        self.hash ^= CELL_KEY_LIST[index]
+        self.free_slot[index] = len(self.free_cells)
+        self.free_cells.append(index)
+
+    def random_free_position(self):
+        # Pixel position of a uniformly random empty cell, or None if the board is full
+        if not self.free_cells:
+            return None
+        index = self.free_cells[int(self.rng.integers(len(self.free_cells)))]
+        return ((index % GRID_WIDTH) * BLOCK_SIZE, (index // GRID_WIDTH) * BLOCK_SIZE)
@@ -0,0 +1,92 @@
+# File: checkpoint.py
+
+import json
+import os
+import queue
+import threading
+import numpy as np
+
+# Full GA checkpoints: the genome matrix plus a JSON metadata blob (generation, RNG states,
+# fitness history, settings) in one .npz file. Loading never unpickles anything.
+
+def atomic_write(path, write):
+    # write(tmp_path) creates the file; it only replaces `path` once it is complete and on disk,
+    # so a crash mid-write leaves the previous file intact
+    tmp_path = f"{path}.tmp"
+    write(tmp_path)
+    with open(tmp_path, 'rb+') as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def write_checkpoint(path, genomes, metadata):
+    with open(path, 'wb') as f:
+        np.savez(f, genomes=genomes, metadata=np.frombuffer(json.dumps(metadata).encode('utf-8'), dtype=np.uint8))
+
+def read_checkpoint(path):
+    # Returns (genomes, metadata)
+    with np.load(path, allow_pickle=False) as data:
+        genomes = data['genomes']
+        metadata = json.loads(data['metadata'].tobytes().decode('utf-8'))
+    return genomes, metadata
+
+
+class AsyncFileWriter:
+    # Writes files on a background thread, so training never waits on disk I/O.
+    # Jobs run in submission order; an error in one is raised on the next submit/flush/close.
+    def __init__(self):
+        self.jobs = queue.Queue()
+        self.error = None
+        self.thread = threading.Thread(target=self._run, name='checkpoint-writer', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            job = self.jobs.get()
+            try:
+                if job is None:
+                    return
+                path, write = job
+                atomic_write(path, write)
+            except Exception as error:
+                self.error = error
+            finally:
+                self.jobs.task_done()
+
+    def _raise_error(self):
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def submit(self, path, write):
+        # write(tmp_path) must only use data that will not change anymore (pass copies)
+        self._raise_error()
+        self.jobs.put((path, write))
+
+    def flush(self):
+        # Waits until every submitted file is written
+        self.jobs.join()
+        self._raise_error()
+
+    def close(self):
+        if self.thread.is_alive():
+            self.jobs.put(None)
+            self.thread.join()
+        self._raise_error()
+
+
+def rng_states():
+    # Global RNG states (Python's random and NumPy's legacy np.random) as JSON-friendly values
+    import random
+    version, internal_state, gauss_next = random.getstate()
+    name, keys, pos, has_gauss, cached_gaussian = np.random.get_state()
+    return {
+        'python': [version, list(internal_state), gauss_next],
+        'numpy': [name, keys.tolist(), pos, has_gauss, cached_gaussian],
+    }
+
+def restore_rng_states(states):
+    import random
+    version, internal_state, gauss_next = states['python']
+    random.setstate((version, tuple(internal_state), gauss_next))
+    name, keys, pos, has_gauss, cached_gaussian = states['numpy']
+    np.random.set_state((name, np.array(keys, dtype=np.uint32), pos, has_gauss, cached_gaussian))
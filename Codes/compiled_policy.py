@@ -0,0 +1,58 @@
+# File: compiled_policy.py
+
+import numpy as np
+from config import BASIC_INPUTS, CLOCKWISE_DIRECTIONS, DIRECTION_ONE_HOT, UP, DOWN, LEFT, RIGHT
+
+# The 11 inputs of the 'basic' sensor pack are 7 bits (3 dangers, 4 food directions) plus the direction one-hot,
+# so a network can only ever see 2**7 * 4 = 512 different states. A compiled policy runs the
+# network once on all of them and keeps the chosen action per state: deciding a move is then
+# one table lookup instead of a forward pass.
+# State key: input bits 0..6 as bits 0..6, direction index (CLOCKWISE_DIRECTIONS) as bits 7..8.
+NUM_STATES = 2**7 * len(CLOCKWISE_DIRECTIONS)
+BIT_WEIGHTS = 1 << np.arange(7)
+# Direction one-hot inputs (dir_left, dir_right, dir_up, dir_down) -> direction index
+ONE_HOT_INDEX = np.array([CLOCKWISE_DIRECTIONS.index(d) for d in (LEFT, RIGHT, UP, DOWN)])
+
+def _all_state_inputs():
+    # (NUM_STATES, BASIC_INPUTS): the network inputs of every state key
+    keys = np.arange(NUM_STATES)
+    inputs = np.zeros((NUM_STATES, BASIC_INPUTS))
+    inputs[:, :7] = (keys[:, np.newaxis] >> np.arange(7)) & 1
+    inputs[:, 7:11] = np.array(DIRECTION_ONE_HOT)[keys >> 7]
+    return inputs
+
+STATE_INPUTS = _all_state_inputs()
+
+def state_keys(inputs):
+    # State key of every row of an (n, BASIC_INPUTS) input batch
+    return (inputs[:, :7] @ BIT_WEIGHTS).astype(np.intp) + (inputs[:, 7:11] @ ONE_HOT_INDEX).astype(np.intp) * 128
+
+def compile_genomes(population):
+    # (P, NUM_STATES) action table for every network of a PopulationNetwork, in one batched pass
+    if population.input_size != BASIC_INPUTS:
+        raise ValueError("Only networks for the 'basic' sensor pack can be compiled.")
+    z1 = np.matmul(STATE_INPUTS, population.W1) + population.b1
+    a1 = np.maximum(0, z1) # ReLU activation function
+    z2 = np.matmul(a1, population.W2) + population.b2
+    return np.argmax(z2, axis=2).astype(np.int8)
+
+
+class CompiledPolicy:
+    # A trained NeuralNetwork reduced to its action table (inference only: recompile after
+    # the weights change). forward() keeps it usable anywhere a network is expected.
+    def __init__(self, nn_model):
+        if nn_model.input_size != BASIC_INPUTS:
+            raise ValueError("Only networks for the 'basic' sensor pack can be compiled.")
+        self.table = np.argmax(nn_model.forward(STATE_INPUTS), axis=1).astype(np.int8)
+        self.actions = self.table.tolist() # Plain list: fastest lookup from Python
+        self.outputs = np.zeros((1, 3))
+
+    def decide(self, key):
+        return self.actions[key]
+
+    def forward(self, inputs):
+        # One-hot "outputs" with the table's action, so argmax(forward(x)) matches the network
+        outputs = np.zeros((len(inputs), 3)) if len(inputs) != 1 else self.outputs
+        outputs[:] = 0
+        outputs[np.arange(len(inputs)), self.table[state_keys(inputs)]] = 1
+        return outputs
@@ -1,6 +1,5 @@
 # File: config.py
 
-import pygame
 import numpy as np
 
 # --- Game Settings ---
@@ -8,6 +7,10 @@ BLOCK_SIZE = 20
 SCREEN_WIDTH = 600
 SCREEN_HEIGHT = 400
 
+# Board size in cells (the game moves one BLOCK_SIZE at a time)
+GRID_WIDTH = SCREEN_WIDTH // BLOCK_SIZE
+GRID_HEIGHT = SCREEN_HEIGHT // BLOCK_SIZE
+
 # Colors (RGB)
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
@@ -24,21 +27,105 @@ RIGHT = (1, 0)
 
 POSSIBLE_DIRECTIONS = [UP, DOWN, LEFT, RIGHT]
 
+# Direction lookup tables, so the AI path never branches on direction tuples.
+# Directions are indexed clockwise, which makes a left turn -1 and a right turn +1.
+CLOCKWISE_DIRECTIONS = [UP, RIGHT, DOWN, LEFT]
+DIRECTION_INDEX = {direction: i for i, direction in enumerate(CLOCKWISE_DIRECTIONS)}
+# TURN_TABLE[direction index][action] -> new direction index (action 0: straight, 1: left, 2: right)
+TURN_TABLE = [(d, (d - 1) % 4, (d + 1) % 4) for d in range(4)]
+# RELATIVE_OFFSETS[direction index] -> pixel offsets of the cells ahead, to the left and to the right
+RELATIVE_OFFSETS = [tuple((CLOCKWISE_DIRECTIONS[i][0] * BLOCK_SIZE, CLOCKWISE_DIRECTIONS[i][1] * BLOCK_SIZE)
+                          for i in turns) for turns in TURN_TABLE]
+# DIRECTION_ONE_HOT[direction index] -> (dir_left, dir_right, dir_up, dir_down) network inputs
+DIRECTION_ONE_HOT = [(int(d == LEFT), int(d == RIGHT), int(d == UP), int(d == DOWN)) for d in CLOCKWISE_DIRECTIONS]
+
+# --- Early termination for headless runs (see termination.py) ---
+STARVATION_BASE = 600 # Moves allowed without food, plus...
+STARVATION_PER_SEGMENT = 10 # ...this many per body segment
+MAX_TICKS = 50000 # Hard cap on the length of one game
+DETECT_LOOPS = True # Stop snakes that repeat the same state without eating
+
 # --- Neural Network Settings ---
-INPUT_NEURONS = 11 # Number of inputs for the neural network (sensors + state)
+# Sensor pack (see sensors.py): 'basic' sees one cell ahead/left/right, food direction and the
+# snake's direction (11 inputs); 'rays' adds the distances to wall, body and food along 8 rays
+SENSOR_PACK = 'basic'
+BASIC_INPUTS = 11
+RAY_COUNT = 8
+SENSOR_PACK_INPUTS = {'basic': BASIC_INPUTS, 'rays': BASIC_INPUTS + RAY_COUNT * 3}
+INPUT_NEURONS = SENSOR_PACK_INPUTS[SENSOR_PACK] # Number of inputs for the neural network (sensors + state)
 HIDDEN_NEURONS = 16 # Number of neurons in the hidden layer
 OUTPUT_NEURONS = 3 # Number of outputs It's a only 3 outputs neurons, so: Turn Left, Right or Go Straight
 
-# File name to save/load the best neural network
-BEST_NN_FILE = "best_snake_nn.pkl"
+# Compiled policies (compiled_policy.py): a network's decisions precomputed for all 512 states
+# of the 'basic' sensor pack (other packs always run the network).
+# Watching the AI and playing against it use one when COMPILE_POLICY is on; fitness evaluation
+# compiles each genome once it plays at least COMPILE_MIN_EPISODES games per generation.
+COMPILE_POLICY = True
+COMPILE_MIN_EPISODES = 4
+
+# File name to save/load the best neural network (binary format, see model_io.py)
+BEST_NN_FILE = "best_snake_nn.snn"
+LEGACY_BEST_NN_FILE = "best_snake_nn.pkl" # Pickle file written by older versions, still loaded
+# int8 export of the best network (quantize.py), written only if its decisions agree with the
+# float network on at least this fraction of recorded states
+QUANTIZED_NN_FILE = "best_snake_nn_int8.snn"
+QUANTIZE_MIN_AGREEMENT = 0.99 # A network trained for 300 generations agreed on 100% of 227606 states
 
 # Display speeds (FPS)
 HUMAN_SPEED = 15
 AI_DISPLAY_SPEED = 30
+AI_WATCH_UNCAPPED = False # True: 'ai_watch' ignores AI_DISPLAY_SPEED and runs as fast as it can draw
 VS_AI_SPEED = 20 
 
+# Tiled viewer (viewer.py): games shown for a single network, pixels per board cell, frame rate
+VIEWER_GAMES = 64
+VIEWER_CELL_PIXELS = 4
+VIEWER_FPS = 30
+
 # --- Genetic Algorithm Settings ---
 POPULATION_SIZE = 20
 MUTATION_RATE = 0.01
 MUTATION_STRENGTH = 0.1
 ELITISM_COUNT = 2
+# Network weights, inputs and activations are float32 (half the memory and bandwidth of float64);
+# trained networks can also be exported as int8 for inference (quantize.py)
+NN_DTYPE = np.float32
+GENOME_DTYPE = NN_DTYPE # The GA keeps every genome in one contiguous (P, G) matrix of this type
+CROSSOVER_METHOD = 'uniform' # 'uniform', 'blend' or 'arithmetic' (see genetic_operators.py)
+# 'generational': evaluate everyone, then breed a whole new population.
+# 'steady_state': each finished evaluation is merged right away (replacing the worst individual)
+# and a new child, picked by tournament selection, goes to the idle worker.
+SCHEDULER = 'generational'
+TOURNAMENT_SIZE = 3 # Individuals per tournament in steady-state mode
+
+# Fitness evaluation: 'vector' steps the whole population at once (vector_env.py),
+# 'game' runs one headless Game per individual
+SIMULATOR = 'vector'
+# Common random numbers: with K > 0, every individual of a generation plays the same K seeded
+# games (new seeds each generation) and its fitness is the average. 0 plays one random game each.
+EVALUATION_SCENARIOS = 0
+# True draws the K scenario seeds once and reuses them every generation, so fitnesses are
+# comparable across generations and the fitness cache can hit for carried-over genomes
+# (at the risk of the population overfitting those K games)
+FIXED_SCENARIOS = False
+# Evaluation results kept for genomes seen before (elites, unchanged children); 0 disables the cache.
+# With scenarios the key includes the seeds, so it only hits across generations with FIXED_SCENARIOS.
+FITNESS_CACHE_SIZE = 0
+
+# Where fitness evaluation runs: 'serial' (this process) or 'process' (a pool of worker processes)
+EVALUATION_BACKEND = 'serial'
+NUM_WORKERS = None # None uses every CPU core
+
+# Island model (island_model.py): independent populations in parallel processes that
+# exchange their best genomes
+NUM_ISLANDS = None # None uses every CPU core
+MIGRATION_TOPOLOGY = 'ring' # 'ring' (to the next island) or 'random' (to any other island)
+MIGRATION_INTERVAL = 5 # Generations between migrations
+MIGRATION_SIZE = 2 # Genomes each island sends per migration
+
+# Directory for replays of each generation's best network (replay.py); None records nothing
+REPLAY_DIR = None
+
+# Training checkpoints (see checkpoint.py): full GA state, so a run can be resumed
+CHECKPOINT_FILE = "ga_checkpoint.npz"
+CHECKPOINT_EVERY = 10 # Generations between checkpoints
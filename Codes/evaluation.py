@@ -0,0 +1,273 @@
+# File: evaluation.py
+
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import os
+import queue
+import traceback
+from collections import Counter, deque
+import numpy as np
+from neural_network import NeuralNetwork, PopulationNetwork
+from simulation import Simulation
+from vector_env import VectorSnakeEnv
+from compiled_policy import CompiledPolicy, compile_genomes, state_keys
+from config import (INPUT_NEURONS, HIDDEN_NEURONS, OUTPUT_NEURONS, GENOME_DTYPE, COMPILE_MIN_EPISODES,
+                    SENSOR_PACK)
+
+RESULT_POLL_SECONDS = 1.0 # How often a process pool waiting for results checks that its workers are alive
+
+def evaluate_genomes(genomes, simulator, rng, termination=None, scenario_seeds=None):
+    # Plays one game per genome (rows of a (P, G) matrix), or with scenario_seeds one game per
+    # genome and seed, every genome playing the same seeded scenarios (common random numbers).
+    # Returns one (fitness, ticks played, termination reason) tuple per genome; over several
+    # scenarios that is the mean fitness, the total ticks and the most common reason.
+    if scenario_seeds is None:
+        return _play_games(genomes, simulator, rng, termination)
+
+    num_scenarios = len(scenario_seeds)
+    per_game = _play_games(genomes, simulator, rng, termination, scenario_seeds)
+    results = []
+    for i in range(len(genomes)):
+        games = per_game[i * num_scenarios:(i + 1) * num_scenarios]
+        reason = Counter(reason for fitness, ticks, reason in games).most_common(1)[0][0]
+        results.append((sum(fitness for fitness, ticks, reason in games) / num_scenarios,
+                        sum(ticks for fitness, ticks, reason in games), reason))
+    return results
+
+def _play_games(genomes, simulator, rng, termination, scenario_seeds=None):
+    # One result per game; with scenario_seeds the games are ordered genome by genome,
+    # each genome playing every seed
+    num_genomes = len(genomes)
+    num_scenarios = 1 if scenario_seeds is None else len(scenario_seeds)
+    # Over enough games, precomputing each network's 512 decisions beats a forward pass per tick
+    compiled = SENSOR_PACK == 'basic' and num_scenarios >= COMPILE_MIN_EPISODES
+    if simulator == 'vector':
+        # All snakes (of every scenario) play at the same time, one batched tick per loop
+        seeds = None if scenario_seeds is None else np.tile(scenario_seeds, num_genomes)
+        env = VectorSnakeEnv(num_genomes * num_scenarios, rng=rng, termination=termination, seeds=seeds)
+        networks = PopulationNetwork.from_genomes(genomes)
+
+        if compiled:
+            tables = compile_genomes(networks)
+
+            def decide(states, alive_ids):
+                # One table lookup per snake still alive
+                return tables[alive_ids // num_scenarios, state_keys(states[alive_ids])]
+        else:
+            def decide(states, alive_ids):
+                # One batched forward pass for every snake still alive
+                return np.argmax(networks.forward(states[alive_ids], alive_ids // num_scenarios), axis=1)
+
+        fitnesses = env.run(decide).tolist()
+        return list(zip(fitnesses, env.lifespan.tolist(), env.get_termination_reasons()))
+
+    results = []
+    nn_model = NeuralNetwork(INPUT_NEURONS, HIDDEN_NEURONS, OUTPUT_NEURONS)
+    for genome in genomes:
+        nn_model.set_flat_weights(genome)
+        policy = CompiledPolicy(nn_model) if compiled else nn_model
+        for scenario in range(num_scenarios):
+            # A seeded scenario gets a generator of its own, so it is the same game for every genome
+            game_rng = rng if scenario_seeds is None else np.random.default_rng(int(scenario_seeds[scenario]))
+            # Run the game for this snake without any display to calculate fitness
+            game_sim = Simulation(mode='ai_watch', nn_model=policy, random_start=True, termination=termination,
+                                  rng=game_rng)
+            game_sim.run() # This runs the game loop until game_over
+            results.append((game_sim.ai_snake.get_fitness(), game_sim.ticks, game_sim.termination_reason))
+    return results
+
+
+def draw_scenario_seeds(rng, num_scenarios):
+    # Seeds for one generation's common scenarios (None when scenarios are off)
+    if not num_scenarios:
+        return None
+    return rng.integers(0, 2**63, size=num_scenarios, dtype=np.int64)
+
+
+class SerialEvaluator:
+    # Evaluates the whole population in the calling process.
+    # With num_scenarios, every evaluate() call draws that many scenario seeds shared by all genomes.
+    def __init__(self, population_size, genome_length, simulator, seed=None, termination=None, num_scenarios=0):
+        self.simulator = simulator
+        self.termination = termination
+        self.num_scenarios = num_scenarios
+        self.rng = np.random.default_rng(seed)
+        # Two (P, G) genome matrices the GA can alternate between (current and next generation)
+        self.genome_buffers = np.zeros((2, population_size, genome_length), dtype=GENOME_DTYPE)
+        # Asynchronous interface (submit/collect), evaluated right away here
+        self.max_in_flight = 1
+        self.finished = deque()
+
+    def draw_scenario_seeds(self):
+        return draw_scenario_seeds(self.rng, self.num_scenarios)
+
+    def evaluate(self, genomes, scenario_seeds=None):
+        # scenario_seeds: this generation's seeds from draw_scenario_seeds() (None draws them here)
+        if scenario_seeds is None:
+            scenario_seeds = self.draw_scenario_seeds()
+        return evaluate_genomes(genomes, self.simulator, self.rng, self.termination, scenario_seeds)
+
+    def submit(self, task_id, genome, scenario_seeds=None):
+        # Evaluates one genome; its result comes back from collect() as (task_id, result)
+        self.finished.append((task_id, self.evaluate(genome[np.newaxis, :], scenario_seeds)[0]))
+
+    def collect(self):
+        return self.finished.popleft()
+
+    def close(self):
+        pass
+
+
+def _worker_main(shm_name, shape, simulator, seed, termination, tasks, results):
+    # Long-lived worker: attaches to the shared genome buffers once, then evaluates index ranges
+    rng = np.random.default_rng(seed)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    buffers = np.ndarray(shape, dtype=GENOME_DTYPE, buffer=shm.buf)
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            slot, start, end, scenario_seeds = task
+            try:
+                results.put(('result', start, evaluate_genomes(buffers[slot, start:end], simulator, rng,
+                                                               termination, scenario_seeds)))
+            except Exception:
+                # Reported to the parent, which raises it (see ProcessPoolEvaluator._next_result)
+                results.put(('error', start, traceback.format_exc()))
+    finally:
+        del buffers
+        shm.close()
+
+
+class ProcessPoolEvaluator:
+    # Spreads fitness evaluation over a pool of persistent worker processes.
+    # The GA keeps its genome matrices directly in shared memory (genome_buffers), so only
+    # index ranges are sent to the workers each generation and nothing is copied.
+    def __init__(self, population_size, genome_length, simulator, num_workers=None, seed=None,
+                 termination=None, num_scenarios=0):
+        self.simulator = simulator
+        self.num_scenarios = num_scenarios
+        self.num_workers = num_workers or os.cpu_count() or 1
+        # Slots 0 and 1 are handed to the GA; slot 2 is scratch space for any other array
+        self.shape = (3, population_size, genome_length)
+
+        size = int(np.prod(self.shape)) * np.dtype(GENOME_DTYPE).itemsize
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        self.buffers = np.ndarray(self.shape, dtype=GENOME_DTYPE, buffer=self.shm.buf)
+        self.genome_buffers = self.buffers[:2]
+
+        # 'spawn' gives workers a clean interpreter instead of a copy of the parent (and its display)
+        ctx = mp.get_context('spawn')
+        self.tasks = ctx.Queue()
+        self.results = ctx.Queue()
+        # Each worker gets its own seed so games differ between workers
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        seeds = seed.generate_state(self.num_workers)
+        # Scenario seeds are drawn here and sent along, so every worker plays the same scenarios
+        self.rng = np.random.default_rng(seed)
+        # Asynchronous interface: a queued task per worker plus one spare, so no worker waits
+        # for the next genome. Each task id owns a row of the scratch buffer.
+        self.max_in_flight = min(population_size, self.num_workers * 2)
+        self.workers = []
+        for worker_id in range(self.num_workers):
+            worker = ctx.Process(target=_worker_main,
+                                 args=(self.shm.name, self.shape, simulator,
+                                       int(seeds[worker_id]), termination, self.tasks, self.results),
+                                 daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+    def _slot_of(self, genomes):
+        # Which shared buffer these genomes already live in (None if they are elsewhere)
+        for slot in range(2):
+            buffer = self.buffers[slot]
+            if genomes.ctypes.data == buffer.ctypes.data and genomes.strides == buffer.strides:
+                return slot
+        return None
+
+    def draw_scenario_seeds(self):
+        return draw_scenario_seeds(self.rng, self.num_scenarios)
+
+    def evaluate(self, genomes, scenario_seeds=None):
+        # scenario_seeds: this generation's seeds from draw_scenario_seeds() (None draws them here)
+        population_size = len(genomes)
+        if population_size > self.shape[1]:
+            raise ValueError("Population is larger than the shared genome buffer.")
+        slot = self._slot_of(genomes)
+        if slot is None:
+            slot = 2
+            self.buffers[slot, :population_size] = genomes
+
+        if self.simulator == 'vector':
+            # One batch per worker: the vector simulator gets faster with bigger batches
+            chunk_size = -(-population_size // self.num_workers)
+        else:
+            # Several chunks per worker, since game lengths vary a lot between individuals
+            chunk_size = max(1, population_size // (self.num_workers * 4))
+        if scenario_seeds is None:
+            scenario_seeds = self.draw_scenario_seeds()
+        num_chunks = 0
+        for start in range(0, population_size, chunk_size):
+            self.tasks.put((slot, start, min(start + chunk_size, population_size), scenario_seeds))
+            num_chunks += 1
+
+        results = [None] * population_size
+        for _ in range(num_chunks):
+            start, chunk_results = self._next_result()
+            results[start:start + len(chunk_results)] = chunk_results
+        return results
+
+    def submit(self, task_id, genome, scenario_seeds=None):
+        # Starts evaluating one genome on the next free worker; task_id must be below
+        # max_in_flight and not in use. The result comes back from collect() as (task_id, result).
+        # Do not mix with evaluate() while tasks are in flight (both use the scratch buffer).
+        self.buffers[2, task_id] = genome
+        self.tasks.put((2, task_id, task_id + 1, scenario_seeds))
+
+    def collect(self):
+        # Waits for the next finished submit(), in completion order
+        task_id, results = self._next_result()
+        return task_id, results[0]
+
+    def _next_result(self):
+        # Waits for the next finished task as (start, results). Raises RuntimeError if a task
+        # failed in a worker or a worker died (killed, out of memory), instead of waiting forever.
+        while True:
+            try:
+                message = self.results.get(timeout=RESULT_POLL_SECONDS)
+            except queue.Empty:
+                for worker in self.workers:
+                    if not worker.is_alive():
+                        raise RuntimeError(f"Evaluation worker exited unexpectedly (exit code {worker.exitcode}).")
+                continue
+            kind, start, payload = message
+            if kind == 'error':
+                raise RuntimeError(f"Evaluation worker failed:\n{payload}")
+            return start, payload
+
+    def close(self):
+        if self.shm is None:
+            return
+        for _ in self.workers:
+            self.tasks.put(None)
+        for worker in self.workers:
+            worker.join(timeout=10)
+            if worker.is_alive():
+                worker.terminate()
+        self.workers = []
+        del self.buffers, self.genome_buffers
+        self.shm.close()
+        self.shm.unlink()
+        self.shm = None
+
+
+def make_evaluator(backend, population_size, genome_length, simulator, num_workers=None, seed=None,
+                   termination=None, num_scenarios=0):
+    if backend == 'serial':
+        return SerialEvaluator(population_size, genome_length, simulator, seed, termination, num_scenarios)
+    if backend == 'process':
+        return ProcessPoolEvaluator(population_size, genome_length, simulator, num_workers, seed, termination,
+                                    num_scenarios)
+    raise ValueError("Invalid evaluation backend.")
@@ -0,0 +1,63 @@
+# File: fitness_cache.py
+
+import hashlib
+from collections import OrderedDict
+import numpy as np
+
+class FitnessCache:
+    # Bounded LRU cache of evaluation results, keyed by a hash of the genome bytes and the
+    # scenario seeds it was evaluated on. Elites and unchanged children are not played again.
+    # Without scenario seeds (one random game per genome) a cached genome keeps the fitness of
+    # its first game, like a GA that does not re-evaluate its elites.
+    def __init__(self, max_entries):
+        if max_entries <= 0:
+            raise ValueError("Fitness cache size must be positive.")
+        self.max_entries = max_entries
+        self.entries = OrderedDict() # key -> (fitness, ticks, reason), least recently used first
+        self.hits = 0 # Totals since the cache was created
+        self.misses = 0
+        self.last_hits = 0 # Last evaluate() call only
+        self.last_misses = 0
+
+    @staticmethod
+    def key(genome, scenario_seeds=None):
+        digest = hashlib.blake2b(np.ascontiguousarray(genome).tobytes(), digest_size=16)
+        if scenario_seeds is not None:
+            digest.update(np.asarray(scenario_seeds, dtype=np.int64).tobytes())
+        return digest.digest()
+
+    def evaluate(self, genomes, scenario_seeds, evaluate):
+        # Results for every row of genomes; evaluate(genomes, scenario_seeds) is only called
+        # for the rows not in the cache, each distinct genome once.
+        # Cached results report 0 ticks, since nothing was simulated for them.
+        keys = [self.key(genome, scenario_seeds) for genome in genomes]
+        results = [None] * len(keys)
+        missing = {} # key -> first row with that key
+        for row, key in enumerate(keys):
+            cached = self.entries.get(key)
+            if cached is not None:
+                self.entries.move_to_end(key)
+                fitness, ticks, reason = cached
+                results[row] = (fitness, 0, reason)
+            elif key not in missing:
+                missing[key] = row
+
+        if missing:
+            rows = list(missing.values())
+            for key, row, result in zip(missing, rows, evaluate(genomes[rows], scenario_seeds)):
+                results[row] = result
+                self.entries[key] = result
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+        # Duplicates of a genome evaluated in this same call
+        for row, key in enumerate(keys):
+            if results[row] is None:
+                fitness, ticks, reason = results[missing[key]]
+                results[row] = (fitness, 0, reason)
+
+        self.last_misses = len(missing)
+        self.last_hits = len(keys) - self.last_misses
+        self.hits += self.last_hits
+        self.misses += self.last_misses
+        return results
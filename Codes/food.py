@@ -1,25 +1,29 @@
 # File: food.py
 
-import pygame
-import random
-# Import settings from config.py
-from config import BLOCK_SIZE, SCREEN_WIDTH, SCREEN_HEIGHT, BLUE
+from board import Board
 
 class Food:
     def __init__(self):
         self.position = (0, 0)
 
-    def spawn(self, occupied_positions):
-        while True:
-            x = random.randrange(0, SCREEN_WIDTH // BLOCK_SIZE) * BLOCK_SIZE
-            y = random.randrange(0, SCREEN_HEIGHT // BLOCK_SIZE) * BLOCK_SIZE
-            self.position = (x, y)
-            # Ensures food does not spawn INSIDE any snake
-            if self.position not in occupied_positions:
-                break
+    def spawn(self, board, rng=None):
+        # Puts the food on a random free cell of the board (never inside a snake), drawn with the
+        # board's generator. Returns False if the board is full and there is nowhere to put it.
+        if not isinstance(board, Board):
+            # A plain list of occupied positions (rng: generator for the temporary board)
+            occupied_positions = board
+            board = Board(rng)
+            for pos in occupied_positions:
+                board.add(pos)
+        position = board.random_free_position()
+        if position is None:
+            return False
+        self.position = position
+        return True
 
     def draw(self, screen):
-        pygame.draw.rect(screen, BLUE, [self.position[0], self.position[1], BLOCK_SIZE, BLOCK_SIZE])
+        from renderer import draw_food # Only load pygame when something is drawn
+        draw_food(screen, self)
 
     def get_pos(self):
         return self.position
@@ -1,122 +1,486 @@
 # File: genetic_algorithm.py
 
+import os
+import time
+import warnings
 import numpy as np
-import random
-from neural_network import NeuralNetwork
-from game import Game
+from collections import Counter, deque
+from neural_network import NeuralNetwork, genome_size, split_genome, initialize_genomes
+from model_io import save_genomes
+from checkpoint import (AsyncFileWriter, write_checkpoint, read_checkpoint, rng_states,
+                        restore_rng_states)
+from evaluation import make_evaluator
+from fitness_cache import FitnessCache
+from replay import record_game, append_replay
+from genetic_operators import gaussian_mutation, CROSSOVER_OPERATORS
+from termination import TerminationPolicy
+from profiler import PROFILER
 from config import (INPUT_NEURONS, HIDDEN_NEURONS, OUTPUT_NEURONS, BEST_NN_FILE,
-                    POPULATION_SIZE, MUTATION_RATE, MUTATION_STRENGTH, ELITISM_COUNT)
+                    POPULATION_SIZE, MUTATION_RATE, MUTATION_STRENGTH, ELITISM_COUNT, CROSSOVER_METHOD,
+                    SIMULATOR, EVALUATION_BACKEND, NUM_WORKERS, EVALUATION_SCENARIOS, FITNESS_CACHE_SIZE,
+                    SCHEDULER, TOURNAMENT_SIZE, REPLAY_DIR, CHECKPOINT_EVERY, FIXED_SCENARIOS)
 
 class GeneticAlgorithmManager:
     def __init__(self, population_size=POPULATION_SIZE, mutation_rate=MUTATION_RATE,
-                 mutation_strength=MUTATION_STRENGTH, elitism_count=ELITISM_COUNT):
+                 mutation_strength=MUTATION_STRENGTH, elitism_count=ELITISM_COUNT,
+                 simulator=SIMULATOR, evaluation_backend=EVALUATION_BACKEND,
+                 num_workers=NUM_WORKERS, seed=None, crossover_method=CROSSOVER_METHOD,
+                 termination=None, checkpoint_file=None, checkpoint_every=CHECKPOINT_EVERY,
+                 best_nn_file=BEST_NN_FILE, verbose=True, evaluation_scenarios=EVALUATION_SCENARIOS,
+                 fitness_cache_size=FITNESS_CACHE_SIZE, scheduler=SCHEDULER, tournament_size=TOURNAMENT_SIZE,
+                 replay_dir=REPLAY_DIR, fixed_scenarios=FIXED_SCENARIOS):
+        if simulator not in ('game', 'vector'):
+            raise ValueError("Invalid simulator.")
+        if scheduler not in ('generational', 'steady_state'):
+            raise ValueError("Invalid scheduler.")
+        if crossover_method not in CROSSOVER_OPERATORS:
+            raise ValueError("Invalid crossover method.")
         self.population_size = population_size
         self.mutation_rate = mutation_rate
         self.mutation_strength = mutation_strength
         self.elitism_count = elitism_count
+        self.simulator = simulator
+        self.evaluation_scenarios = evaluation_scenarios
+        self.fixed_scenarios = fixed_scenarios
+        self.crossover_method = crossover_method
+        self.scheduler = scheduler
+        self.tournament_size = tournament_size
+        self.crossover = CROSSOVER_OPERATORS[crossover_method]
+        # Independent random streams for breeding and for evaluation, both derived from seed
+        seed_sequence = np.random.SeedSequence(seed)
+        self.seed = seed_sequence.entropy # Kept in checkpoints
+        breeding_seed, evaluation_seed, replay_seed = seed_sequence.spawn(3)
+        self.rng = np.random.default_rng(breeding_seed)
+        # Seeds of the recorded replay games (a stream of their own, so recording changes nothing else)
+        self.replay_rng = np.random.default_rng(replay_seed)
+        self.replay_dir = replay_dir
 
-        self.population = [NeuralNetwork(INPUT_NEURONS, HIDDEN_NEURONS, OUTPUT_NEURONS) for _ in range(population_size)]
         self.best_fitness_ever = -float('inf') # Initialize with a very low number
         self.generation = 0
+        # Why the games of the last generation ended, e.g. {'collision': 15, 'loop': 5}
+        self.termination_counts = Counter()
+        self.ticks_simulated = 0
+        self.history = [] # Fitness summary of every generation so far
+        self.best_genome = None # Copy of the best genome ever evaluated
+        self.ranking = None # Generational: rows of the last evaluated generation, best first
+
+        # Full checkpoint every checkpoint_every generations (None disables them).
+        # The best network and checkpoints are written by a background thread.
+        self.best_nn_file = best_nn_file
+        self.verbose = verbose # Progress messages on stdout (run_generation also returns them as stats)
+        self.checkpoint_file = checkpoint_file
+        self.checkpoint_every = checkpoint_every
+        self.writer = AsyncFileWriter()
+
+        # Stuck or looping snakes are stopped early so one of them cannot stall a generation
+        if termination is None:
+            termination = TerminationPolicy()
+        self.termination = termination
+        self.evaluator = make_evaluator(evaluation_backend, population_size,
+                                        genome_size(INPUT_NEURONS, HIDDEN_NEURONS, OUTPUT_NEURONS),
+                                        simulator, num_workers, evaluation_seed, termination,
+                                        evaluation_scenarios)
+
+        # With fixed_scenarios every generation plays this one scenario set (None: new seeds each time)
+        self.scenario_seeds = self.evaluator.draw_scenario_seeds() if fixed_scenarios else None
+
+        # Results of genomes already evaluated on the same scenarios (fitness_cache.py)
+        self.fitness_cache = FitnessCache(fitness_cache_size) if fitness_cache_size else None
+        if self.fitness_cache is not None and evaluation_scenarios and not fixed_scenarios:
+            warnings.warn("The fitness cache only hits within a generation when the scenarios are redrawn "
+                          "every generation; use fixed_scenarios to reuse results across generations.")
+
+        # The whole population lives in one contiguous (P, G) genome matrix, plus a second one
+        # the next generation is written into before they swap. The evaluator provides both
+        # (in shared memory for the process pool), so nothing is copied to evaluate.
+        self.genomes, self.next_genomes = self.evaluator.genome_buffers
+        initialize_genomes(self.genomes, self.rng)
+        # Each NeuralNetwork is a zero-copy view into its row: it always shows the current
+        # contents of that row, so copy it (get_flat_weights) to keep it across generations
+        self.population = self._make_views(self.genomes)
+        self.next_population = self._make_views(self.next_genomes)
+
+        # Steady-state bookkeeping: fitness of every row (NaN until evaluated), rows still
+        # waiting for their first evaluation, and what each in-flight task is evaluating
+        # (a population row, or None for a child kept in child_genomes[task_id])
+        self.fitnesses = np.full(population_size, np.nan)
+        self.unevaluated = deque(range(population_size))
+        self.in_flight = {}
+        self.child_genomes = np.zeros((self.evaluator.max_in_flight, self.genomes.shape[1]), dtype=self.genomes.dtype)
+
+    @staticmethod
+    def _make_views(genomes):
+        return [NeuralNetwork(INPUT_NEURONS, HIDDEN_NEURONS, OUTPUT_NEURONS, genome=row) for row in genomes]
+
+    def close(self):
+        # Stops the evaluation workers (if any) and waits for pending files; call when training is done
+        try:
+            # Steady-state tasks still running: their results are not needed anymore
+            while self.in_flight:
+                task_id, result = self.evaluator.collect()
+                del self.in_flight[task_id]
+            self.writer.close()
+        finally:
+            # The genome matrices may live in the evaluator's shared memory, which closing unmaps:
+            # move them (and the networks viewing them) to private memory first
+            self.genomes = self.genomes.copy()
+            self.next_genomes = self.next_genomes.copy()
+            self.population = self._make_views(self.genomes)
+            self.next_population = self._make_views(self.next_genomes)
+            self.evaluator.close()
+
+    def _log(self, message):
+        if self.verbose:
+            print(message)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def run_generation(self):
+        # Evaluates and breeds one generation; returns its statistics (fitness, throughput, phase times)
+        if self.scheduler == 'steady_state':
+            return self._run_steady_state()
         self.generation += 1
-        print(f"\n--- Generation {self.generation} ---")
-
-        fitness_scores = []
-        for i, nn_model in enumerate(self.population):
-            # Run the game for this snake in headless mode to calculate fitness
-            # Each game instance needs its own Pygame initialization if not headless,
-            # but in headless mode, it won't create a display.
-            # We set headless=True here for training speed.
-            game_sim = Game(mode='ai_watch', nn_model=nn_model, headless=True)
-            game_sim.run() # This runs the game loop until game_over
-            fitness = game_sim.ai_snake.get_fitness()
-            fitness_scores.append((fitness, nn_model))
-            # print(f"  Snake {i+1} Fitness: {fitness}") # Optional: print individual fitness
+        self._log(f"\n--- Generation {self.generation} ---")
+        phase_seconds = {}
+        generation_start = start = time.perf_counter()
+
+        results = self._evaluate_population()
+        fitnesses = np.array([fitness for fitness, ticks, reason in results])
+        self.ticks_simulated = sum(ticks for fitness, ticks, reason in results)
+        self.termination_counts = Counter(reason for fitness, ticks, reason in results)
+        start = self._lap(phase_seconds, 'evaluate', start)
+        self._log(f"Ticks simulated: {self.ticks_simulated}, games ended by: {dict(self.termination_counts)}")
+        if self.fitness_cache is not None:
+            self._log(f"Fitness cache: {self.fitness_cache.last_hits} hits, {self.fitness_cache.last_misses} misses")
 
         # Sort by fitness (best to worst)
-        fitness_scores.sort(key=lambda x: x[0], reverse=True)
+        order = np.argsort(-fitnesses, kind='stable')
+        self.ranking = order
 
         # Print best fitness of this generation
-        current_best_fitness = fitness_scores[0][0]
-        print(f"Generation {self.generation} Best Fitness: {current_best_fitness}")
+        current_best_fitness = fitnesses[order[0]].item()
+        self._log(f"Generation {self.generation} Best Fitness: {current_best_fitness}")
+
+        self.history.append({'generation': self.generation, 'best': current_best_fitness,
+                             'mean': fitnesses.mean().item(), 'median': np.median(fitnesses).item()})
+        start = self._lap(phase_seconds, 'sort', start)
 
         # Save the best neural network of this generation (if it's the best ever seen)
-        best_nn_gen = fitness_scores[0][1]
         if current_best_fitness > self.best_fitness_ever:
             self.best_fitness_ever = current_best_fitness
-            best_nn_gen.save(BEST_NN_FILE)
-            print(f"New global best fitness: {self.best_fitness_ever}")
+            self._save_best(self.genomes[order[0]])
+            self._log(f"New global best fitness: {self.best_fitness_ever}")
+        if self.replay_dir:
+            self._record_replay(self.genomes[order[0]])
+        start = self._lap(phase_seconds, 'save', start)
 
         # Selection: Choose parents based on fitness (e.g., top N individuals)
         # Simple truncation selection: take the top N individuals as parents for the next generation
-        parents = [nn for fitness, nn in fitness_scores[:self.population_size // 2]] # Take top 50% as parents
-
-        # Create the next generation
-        next_population = []
+        parents = order[:self.population_size // 2] # Take top 50% as parents
 
         # Elitism: Carry over the very best individuals directly to the next generation
-        for i in range(min(self.elitism_count, len(fitness_scores))):
-            next_population.append(fitness_scores[i][1])
+        num_elites = min(self.elitism_count, self.population_size)
+        self.next_genomes[:num_elites] = self.genomes[order[:num_elites]]
 
-        # Fill the rest of the population through crossover and mutation
-        while len(next_population) < self.population_size:
-            # Randomly select two parents (can be the same parent, or use a more sophisticated selection like roulette wheel)
-            parent1 = random.choice(parents)
-            parent2 = random.choice(parents)
+        # Fill the rest of the population through crossover and mutation, all children at once
+        num_children = self.population_size - num_elites
+        if num_children > 0:
+            # Randomly select two parents per child (can be the same parent)
+            parents1 = self.genomes[parents[self.rng.integers(len(parents), size=num_children)]]
+            parents2 = self.genomes[parents[self.rng.integers(len(parents), size=num_children)]]
+            start = self._lap(phase_seconds, 'select', start)
 
-            # Crossover
-            child_weights = self._crossover(parent1.get_weights(), parent2.get_weights())
+            # Crossover and mutation both return new arrays, so parents and elites stay untouched
+            children = self.crossover(parents1, parents2, self.rng)
+            self.next_genomes[num_elites:] = gaussian_mutation(children, self.mutation_rate,
+                                                               self.mutation_strength, self.rng)
+        else:
+            start = self._lap(phase_seconds, 'select', start)
 
-            # Create a new NN for the child
-            child_nn = NeuralNetwork(INPUT_NEURONS, HIDDEN_NEURONS, OUTPUT_NEURONS)
-            child_nn.set_weights(child_weights)
+        # The next generation becomes the current one; the old matrix is reused next time
+        self.genomes, self.next_genomes = self.next_genomes, self.genomes
+        self.population, self.next_population = self.next_population, self.population
+        start = self._lap(phase_seconds, 'breed', start)
 
-            # Mutate
-            self._mutate(child_nn)
+        if self.checkpoint_file and self.checkpoint_every and self.generation % self.checkpoint_every == 0:
+            self.save_checkpoint()
+        end = self._lap(phase_seconds, 'save', start)
 
-            next_population.append(child_nn)
+        wall_seconds = end - generation_start
+        evaluate_seconds = max(phase_seconds['evaluate'], 1e-9)
+        return dict(self.history[-1],
+                    best_fitness_ever=self.best_fitness_ever,
+                    evaluations=len(results),
+                    ticks=self.ticks_simulated,
+                    evals_per_sec=len(results) / evaluate_seconds,
+                    ticks_per_sec=self.ticks_simulated / evaluate_seconds,
+                    termination_counts=dict(self.termination_counts),
+                    cache_hits=self.fitness_cache.last_hits if self.fitness_cache else 0,
+                    cache_misses=self.fitness_cache.last_misses if self.fitness_cache else len(results),
+                    phase_seconds=phase_seconds,
+                    wall_seconds=wall_seconds)
 
-        self.population = next_population
+    def _run_steady_state(self):
+        # Steady-state "generation": population_size evaluations finish, each one merged as soon as
+        # it arrives. Tasks keep running across calls, so there is never a barrier to wait at.
+        self.generation += 1
+        self._log(f"\n--- Generation {self.generation} (steady state) ---")
+        phase_seconds = {}
+        generation_start = start = time.perf_counter()
+        # One scenario set per window, so the children of a window are compared on the same games
+        scenario_seeds = self._draw_scenario_seeds()
 
-    def _crossover(self, parent1_weights, parent2_weights):
-        # Simple uniform crossover for weights and biases
-        # For each weight matrix/bias vector, randomly choose from parent1 or parent2
-        W1_p1, b1_p1, W2_p1, b2_p1 = parent1_weights
-        W1_p2, b1_p2, W2_p2, b2_p2 = parent2_weights
+        results = []
+        while len(results) < self.population_size:
+            start = self._fill_workers(phase_seconds, start, scenario_seeds)
+            task_id, result = self.evaluator.collect()
+            start = self._lap(phase_seconds, 'evaluate', start)
+            results.append(result)
+            fitness = result[0]
+
+            row = self.in_flight.pop(task_id)
+            if row is None:
+                # Steady-state replacement: a child takes the place of the worst individual
+                # if it is at least as good. With no evaluated individual left (receive_migrants
+                # reset them all while the child was running) the child is dropped: every row is
+                # then waiting for its own evaluation.
+                genome = self.child_genomes[task_id]
+                if not np.isnan(self.fitnesses).all():
+                    row = np.nanargmin(self.fitnesses)
+                    if fitness >= self.fitnesses[row]:
+                        self.genomes[row] = genome
+                        self.fitnesses[row] = fitness
+            else:
+                genome = self.genomes[row]
+                self.fitnesses[row] = fitness
+            start = self._lap(phase_seconds, 'select', start)
+
+            if fitness > self.best_fitness_ever:
+                self.best_fitness_ever = fitness
+                self._save_best(genome)
+                self._log(f"New global best fitness: {self.best_fitness_ever}")
+                start = self._lap(phase_seconds, 'save', start)
+
+        self.ticks_simulated = sum(ticks for fitness, ticks, reason in results)
+        self.termination_counts = Counter(reason for fitness, ticks, reason in results)
+        self._log(f"Ticks simulated: {self.ticks_simulated}, games ended by: {dict(self.termination_counts)}")
+        evaluated = self.fitnesses[~np.isnan(self.fitnesses)]
+        current_best_fitness = evaluated.max().item()
+        self._log(f"Generation {self.generation} Best Fitness: {current_best_fitness}")
+        self.history.append({'generation': self.generation, 'best': current_best_fitness,
+                             'mean': evaluated.mean().item(), 'median': np.median(evaluated).item()})
+        start = self._lap(phase_seconds, 'sort', start)
 
-        child_W1 = W1_p1 if random.random() < 0.5 else W1_p2
-        child_b1 = b1_p1 if random.random() < 0.5 else b1_p2
-        child_W2 = W2_p1 if random.random() < 0.5 else W2_p2
-        child_b2 = b2_p1 if random.random() < 0.5 else b2_p2
+        if self.replay_dir:
+            self._record_replay(self.genomes[np.nanargmax(self.fitnesses)])
 
-        return (child_W1, child_b1, child_W2, child_b2)
+        if self.checkpoint_file and self.checkpoint_every and self.generation % self.checkpoint_every == 0:
+            self.save_checkpoint()
+        end = self._lap(phase_seconds, 'save', start)
+
+        evaluate_seconds = max(phase_seconds['evaluate'], 1e-9)
+        return dict(self.history[-1],
+                    best_fitness_ever=self.best_fitness_ever,
+                    evaluations=len(results),
+                    ticks=self.ticks_simulated,
+                    evals_per_sec=len(results) / evaluate_seconds,
+                    ticks_per_sec=self.ticks_simulated / evaluate_seconds,
+                    termination_counts=dict(self.termination_counts),
+                    cache_hits=0,
+                    cache_misses=len(results),
+                    phase_seconds=phase_seconds,
+                    wall_seconds=end - generation_start)
+
+    def _fill_workers(self, phase_seconds, start, scenario_seeds):
+        # Gives every idle task slot something to evaluate: rows never evaluated first, then
+        # new children bred from tournament winners. Returns the start of the next phase.
+        for task_id in range(self.evaluator.max_in_flight):
+            if task_id in self.in_flight:
+                continue
+            if self.unevaluated:
+                row = self.unevaluated.popleft()
+                self.evaluator.submit(task_id, self.genomes[row], scenario_seeds)
+                self.in_flight[task_id] = row
+                start = self._lap(phase_seconds, 'evaluate', start)
+                continue
+
+            evaluated = np.flatnonzero(~np.isnan(self.fitnesses))
+            if evaluated.size == 0:
+                break # Nothing to select from until the first results are in
+            # Tournament selection: two tournaments of tournament_size random individuals
+            contestants = evaluated[self.rng.integers(evaluated.size, size=(2, self.tournament_size))]
+            winners = contestants[np.arange(2), np.argmax(self.fitnesses[contestants], axis=1)]
+            start = self._lap(phase_seconds, 'select', start)
+
+            child = self.crossover(self.genomes[winners[:1]], self.genomes[winners[1:]], self.rng)
+            self.child_genomes[task_id] = gaussian_mutation(child, self.mutation_rate,
+                                                            self.mutation_strength, self.rng)[0]
+            start = self._lap(phase_seconds, 'breed', start)
+
+            # The serial evaluator plays the game inside submit()
+            self.evaluator.submit(task_id, self.child_genomes[task_id], scenario_seeds)
+            self.in_flight[task_id] = None
+            start = self._lap(phase_seconds, 'evaluate', start)
+        return start
+
+    @staticmethod
+    def _lap(phase_seconds, phase, start):
+        # Ends a run_generation phase that began at start; returns the start of the next one
+        end = time.perf_counter()
+        phase_seconds[phase] = phase_seconds.get(phase, 0.0) + end - start
+        if PROFILER.enabled:
+            PROFILER.lap('ga', phase, start, end)
+        return end
+
+    def _save_best(self, genome):
+        # Copied now, written in the background while the next generation runs
+        # (best_nn_file=None only keeps it in best_genome)
+        genome = self.best_genome = genome.copy()
+        if self.best_nn_file:
+            self.writer.submit(self.best_nn_file, lambda path: save_genomes(path, genome))
+            self._log(f"Saving best network to {self.best_nn_file}")
+
+    def _record_replay(self, genome):
+        # Plays the generation's best network once more, recording it to this generation's replay file
+        os.makedirs(self.replay_dir, exist_ok=True)
+        nn_model = NeuralNetwork(INPUT_NEURONS, HIDDEN_NEURONS, OUTPUT_NEURONS, genome=genome)
+        seed = int(self.replay_rng.integers(2**63))
+        replay = record_game(nn_model, seed, self.termination, self.generation)
+        append_replay(os.path.join(self.replay_dir, f"generation_{self.generation:05d}.snr"), replay)
+
+    def top_genomes(self, count):
+        # Copies of the best `count` genomes of the last evaluation (for migration between islands)
+        if self.scheduler == 'steady_state':
+            evaluated = np.flatnonzero(~np.isnan(self.fitnesses))
+            best = evaluated[np.argsort(-self.fitnesses[evaluated], kind='stable')[:count]]
+            return self.genomes[best].copy()
+        if self.ranking is None:
+            return self.genomes[:0].copy()
+        # After breeding, the evaluated generation is still intact in next_genomes
+        return self.next_genomes[self.ranking[:count]].copy()
+
+    def receive_migrants(self, genomes):
+        # Puts genomes from another population in place of the worst (or not yet evaluated) ones
+        count = min(len(genomes), self.population_size)
+        if count == 0:
+            return
+        genomes = genomes[:count]
+        if self.scheduler == 'steady_state':
+            # Worst first; rows still waiting for evaluation (NaN) are left alone
+            ranked = np.argsort(self.fitnesses, kind='stable')
+            rows = ranked[~np.isnan(self.fitnesses[ranked])][:count]
+            genomes = genomes[:len(rows)]
+            self.genomes[rows] = genomes
+            self.fitnesses[rows] = np.nan
+            self.unevaluated.extend(rows.tolist())
+        else:
+            # The new generation is not evaluated yet: replace children from the end, never the elites
+            start = max(min(self.elitism_count, self.population_size), self.population_size - count)
+            self.genomes[start:] = genomes[:self.population_size - start]
+
+    def state_dict(self):
+        # Everything needed to continue training exactly where it stopped: (genomes, metadata)
+        metadata = {
+            'generation': self.generation,
+            'best_fitness_ever': self.best_fitness_ever,
+            'history': list(self.history),
+            'seed': self.seed,
+            'settings': {
+                'population_size': self.population_size,
+                'mutation_rate': self.mutation_rate,
+                'mutation_strength': self.mutation_strength,
+                'elitism_count': self.elitism_count,
+                'simulator': self.simulator,
+                'evaluation_scenarios': self.evaluation_scenarios,
+                'fixed_scenarios': self.fixed_scenarios,
+                'fitness_cache_size': self.fitness_cache.max_entries if self.fitness_cache else 0,
+                'crossover_method': self.crossover_method,
+                'scheduler': self.scheduler,
+                'tournament_size': self.tournament_size,
+            },
+            # Steady state only: fitness per row (NaN = not evaluated yet; in-flight children are dropped)
+            'fitnesses': self.fitnesses.tolist(),
+            'scenario_seeds': None if self.scenario_seeds is None else self.scenario_seeds.tolist(),
+            'rng_state': self.rng.bit_generator.state,
+            'replay_rng_state': self.replay_rng.bit_generator.state,
+            'global_rng_states': rng_states(),
+        }
+        # The evaluator's stream in this process (scenario seeds, serial games)
+        evaluation_rng = getattr(self.evaluator, 'rng', None)
+        if evaluation_rng is not None:
+            metadata['evaluation_rng_state'] = evaluation_rng.bit_generator.state
+        return self.genomes.copy(), metadata
+
+    def load_state_dict(self, genomes, metadata):
+        if genomes.shape != self.genomes.shape:
+            raise ValueError(f"Checkpoint population has shape {genomes.shape}, expected {self.genomes.shape}.")
+        self.genomes[...] = genomes
+        self.generation = metadata['generation']
+        self.best_fitness_ever = metadata['best_fitness_ever']
+        self.history = metadata['history']
+        self.fitnesses[:] = metadata.get('fitnesses', np.nan)
+        self.unevaluated = deque(np.flatnonzero(np.isnan(self.fitnesses)).tolist())
+        if metadata.get('scenario_seeds') is not None:
+            self.scenario_seeds = np.array(metadata['scenario_seeds'], dtype=np.int64)
+        self.rng.bit_generator.state = metadata['rng_state']
+        if 'replay_rng_state' in metadata:
+            self.replay_rng.bit_generator.state = metadata['replay_rng_state']
+        restore_rng_states(metadata['global_rng_states'])
+        evaluation_rng = getattr(self.evaluator, 'rng', None)
+        if evaluation_rng is not None and 'evaluation_rng_state' in metadata:
+            evaluation_rng.bit_generator.state = metadata['evaluation_rng_state']
+
+    def save_checkpoint(self, filename=None):
+        # Snapshot now, write in the background (atomically replaced, never half-written)
+        filename = filename or self.checkpoint_file
+        if not filename:
+            raise ValueError("No checkpoint file: pass a filename or set checkpoint_file.")
+        genomes, metadata = self.state_dict()
+        self.writer.submit(filename, lambda path: write_checkpoint(path, genomes, metadata))
+        self._log(f"Saving checkpoint to {filename}")
+
+    @classmethod
+    def resume(cls, filename, **kwargs):
+        # Continues a run from a checkpoint; its settings are used unless given in kwargs
+        genomes, metadata = read_checkpoint(filename)
+        settings = dict(metadata['settings'], seed=metadata['seed'], checkpoint_file=filename)
+        settings.update(kwargs)
+        manager = cls(**settings)
+        try:
+            manager.load_state_dict(genomes, metadata)
+        except Exception:
+            manager.close()
+            raise
+        manager._log(f"Resumed from {filename} at generation {manager.generation}")
+        return manager
+
+    def _evaluate_population(self):
+        # The genome matrix is all the evaluator needs (workers read it from shared memory)
+        # The cache key includes this generation's scenarios, so draw them first
+        scenario_seeds = self._draw_scenario_seeds()
+        if self.fitness_cache is None:
+            return self.evaluator.evaluate(self.genomes, scenario_seeds)
+        return self.fitness_cache.evaluate(self.genomes, scenario_seeds, self.evaluator.evaluate)
+
+    def _draw_scenario_seeds(self):
+        # This generation's scenario seeds (None when scenarios are off)
+        if self.fixed_scenarios:
+            return self.scenario_seeds
+        return self.evaluator.draw_scenario_seeds()
+
+    def _crossover(self, parent1_weights, parent2_weights):
+        # Crossover for weight tuples (W1, b1, W2, b2); returns a new tuple, parents are not modified
+        parent1 = np.concatenate([w.ravel() for w in parent1_weights])
+        parent2 = np.concatenate([w.ravel() for w in parent2_weights])
+        return split_genome(self.crossover(parent1, parent2, self.rng))
 
     def _mutate(self, nn_model):
-        # Mutate the weights and biases of the neural network
-        W1, b1, W2, b2 = nn_model.get_weights()
-
-        # Mutate W1
-        for i in range(W1.shape[0]):
-            for j in range(W1.shape[1]):
-                if random.random() < self.mutation_rate:
-                    W1[i, j] += np.random.randn() * self.mutation_strength
-
-        # Mutate b1
-        for i in range(b1.shape[1]):
-            if random.random() < self.mutation_rate:
-                b1[0, i] += np.random.randn() * self.mutation_strength
-
-        # Mutate W2
-        for i in range(W2.shape[0]):
-            for j in range(W2.shape[1]):
-                if random.random() < self.mutation_rate:
-                    W2[i, j] += np.random.randn() * self.mutation_strength
-
-        # Mutate b2
-        for i in range(b2.shape[1]):
-            if random.random() < self.mutation_rate:
-                b2[0, i] += np.random.randn() * self.mutation_strength
-
-        nn_model.set_weights((W1, b1, W2, b2))
+        # Mutate the weights and biases of the neural network (only this network is changed)
+        mutated = gaussian_mutation(nn_model.get_flat_weights(), self.mutation_rate, self.mutation_strength, self.rng)
+        # Written in place, so a network that is a view into the genome matrix stays one
+        for weights, new_weights in zip(nn_model.get_weights(), split_genome(mutated)):
+            weights[...] = new_weights
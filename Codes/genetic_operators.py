@@ -0,0 +1,38 @@
+# File: genetic_operators.py
+
+import numpy as np
+
+# Operators on flat genomes (see neural_network.split_genome).
+# Each one works on a single genome or on a (K, G) batch of them, and always
+# returns new arrays: parents are never modified.
+
+def gaussian_mutation(genomes, rate, strength, rng):
+    # Each gene is mutated with probability `rate` by adding N(0, strength) noise
+    mutated = np.array(genomes, copy=True)
+    mask = rng.random(mutated.shape) < rate
+    mutated[mask] += rng.standard_normal(np.count_nonzero(mask)) * strength
+    return mutated
+
+def uniform_crossover(parents1, parents2, rng):
+    # Each gene comes from either parent with equal probability
+    mask = rng.random(np.shape(parents1)) < 0.5
+    return np.where(mask, parents1, parents2)
+
+def blend_crossover(parents1, parents2, rng, alpha=0.5):
+    # BLX-alpha: each gene is drawn uniformly from the parents' range widened by alpha on both sides
+    low = np.minimum(parents1, parents2)
+    high = np.maximum(parents1, parents2)
+    spread = (high - low) * alpha
+    return rng.uniform(low - spread, high + spread)
+
+def arithmetic_crossover(parents1, parents2, rng):
+    # Weighted average of the parents, with one random weight per child
+    shape = np.shape(parents1)
+    weight = rng.random(shape[:-1] + (1,))
+    return weight * parents1 + (1 - weight) * parents2
+
+CROSSOVER_OPERATORS = {
+    'uniform': uniform_crossover,
+    'blend': blend_crossover,
+    'arithmetic': arithmetic_crossover,
+}
@@ -0,0 +1,143 @@
+# File: island_model.py
+
+import multiprocessing as mp
+import os
+import queue
+import time
+import traceback
+import numpy as np
+from genetic_algorithm import GeneticAlgorithmManager
+from checkpoint import atomic_write
+from model_io import save_genomes
+from evaluation import RESULT_POLL_SECONDS
+from profiler import PROFILER
+from config import (BEST_NN_FILE, NUM_ISLANDS, MIGRATION_TOPOLOGY, MIGRATION_INTERVAL, MIGRATION_SIZE)
+
+# Island model: several independent populations, one per process (and core). Every
+# migration_interval generations each island sends copies of its best migration_size genomes
+# to another island (the next one on a ring, or a random one), where they replace the worst.
+# Islands never wait for each other: migrants are picked up at the receiver's next migration.
+
+def _island_main(island_id, num_islands, num_generations, topology, migration_interval, migration_size,
+                 seed, ga_settings, inboxes, progress, profile):
+    try:
+        if profile:
+            PROFILER.enable()
+        rng = np.random.default_rng(seed)
+        ga_manager = GeneticAlgorithmManager(seed=seed, evaluation_backend='serial', checkpoint_file=None,
+                                             best_nn_file=None, verbose=False, **ga_settings)
+        with ga_manager:
+            for _ in range(num_generations):
+                stats = ga_manager.run_generation()
+                progress.put(('generation', island_id, stats))
+
+                if num_islands > 1 and migration_interval and ga_manager.generation % migration_interval == 0:
+                    if topology == 'ring':
+                        target = (island_id + 1) % num_islands
+                    else:
+                        target = (island_id + 1 + int(rng.integers(num_islands - 1))) % num_islands
+                    inboxes[target].put(ga_manager.top_genomes(migration_size))
+                    # Take whatever has arrived so far
+                    while True:
+                        try:
+                            ga_manager.receive_migrants(inboxes[island_id].get_nowait())
+                        except queue.Empty:
+                            break
+            # With profiling on, the island's timings go back to be merged into the parent's PROFILER
+            progress.put(('done', island_id, ga_manager.best_fitness_ever, ga_manager.best_genome,
+                          PROFILER.state() if profile else None))
+    except Exception:
+        progress.put(('error', island_id, traceback.format_exc()))
+    finally:
+        # Migrants nobody will read must not keep this process from exiting
+        for inbox in inboxes:
+            inbox.cancel_join_thread()
+
+def _check_islands(islands, done, clean_exit_ok):
+    # Raises RuntimeError for an island that exited before sending 'done'
+    for island_id, island in enumerate(islands):
+        if island_id in done or island.is_alive() or (clean_exit_ok and island.exitcode == 0):
+            continue
+        raise RuntimeError(f"Island {island_id} exited unexpectedly (exit code {island.exitcode}).")
+
+
+class IslandModel:
+    # Runs num_islands GeneticAlgorithmManagers in parallel with migration, then merges:
+    # the best genome of all islands is written to best_nn_file.
+    # ga_settings are passed to every island's GeneticAlgorithmManager (population_size is per island).
+    def __init__(self, num_islands=NUM_ISLANDS, topology=MIGRATION_TOPOLOGY, migration_interval=MIGRATION_INTERVAL,
+                 migration_size=MIGRATION_SIZE, seed=None, best_nn_file=BEST_NN_FILE, **ga_settings):
+        if topology not in ('ring', 'random'):
+            raise ValueError("Invalid migration topology.")
+        self.num_islands = num_islands or os.cpu_count() or 1
+        self.topology = topology
+        self.migration_interval = migration_interval
+        self.migration_size = migration_size
+        self.seed = seed
+        self.best_nn_file = best_nn_file
+        self.ga_settings = ga_settings
+        self.best_fitness_ever = -float('inf')
+        self.best_genome = None
+
+    def run(self, num_generations, on_generation=None):
+        # Runs every island for num_generations generations. on_generation(island_id, stats) is
+        # called as their results come in. Returns (best fitness, best genome) over all islands.
+        seeds = [child.generate_state(4).tolist() for child in np.random.SeedSequence(self.seed).spawn(self.num_islands)]
+        ctx = mp.get_context('spawn')
+        inboxes = [ctx.Queue() for _ in range(self.num_islands)]
+        progress = ctx.Queue()
+        islands = [ctx.Process(target=_island_main,
+                               args=(island_id, self.num_islands, num_generations, self.topology,
+                                     self.migration_interval, self.migration_size, seeds[island_id],
+                                     self.ga_settings, inboxes, progress, PROFILER.enabled),
+                               daemon=True)
+                   for island_id in range(self.num_islands)]
+        for island in islands:
+            island.start()
+
+        try:
+            done = set()
+            next_check = time.monotonic() + RESULT_POLL_SECONDS
+            while len(done) < self.num_islands:
+                try:
+                    message = progress.get(timeout=RESULT_POLL_SECONDS)
+                except queue.Empty:
+                    # Nothing is left in flight, so an island that has exited without sending 'done'
+                    # was killed (signal, out of memory) or crashed before it could report
+                    _check_islands(islands, done, clean_exit_ok=False)
+                    continue
+                if time.monotonic() >= next_check:
+                    # The other islands may keep the queue busy: catch killed ones meanwhile too
+                    # (a clean exit may still have its 'done' queued behind other messages)
+                    _check_islands(islands, done, clean_exit_ok=True)
+                    next_check = time.monotonic() + RESULT_POLL_SECONDS
+                if message[0] == 'generation':
+                    if on_generation is not None:
+                        on_generation(message[1], message[2])
+                elif message[0] == 'done':
+                    island_id, best_fitness, best_genome, profile = message[1:]
+                    done.add(island_id)
+                    if profile is not None:
+                        PROFILER.merge(profile)
+                    if best_genome is not None and best_fitness > self.best_fitness_ever:
+                        self.best_fitness_ever = best_fitness
+                        self.best_genome = best_genome
+                else:
+                    raise RuntimeError(f"Island {message[1]} failed:\n{message[2]}")
+        except BaseException:
+            # One island failed (or the run was interrupted): stop the others instead of waiting for them
+            for island in islands:
+                if island.is_alive():
+                    island.terminate()
+            raise
+        finally:
+            for island in islands:
+                island.join(timeout=10)
+                if island.is_alive():
+                    island.terminate()
+
+        # Merge: the global best goes to best_nn_file
+        if self.best_genome is not None and self.best_nn_file:
+            genome = self.best_genome
+            atomic_write(self.best_nn_file, lambda path: save_genomes(path, genome))
+        return self.best_fitness_ever, self.best_genome
@@ -1,28 +1,21 @@
-import pygame
+import os
 import sys # For sys.exit()
 from game import Game
 from neural_network import NeuralNetwork
+from compiled_policy import CompiledPolicy
 from genetic_algorithm import GeneticAlgorithmManager # Now importing the GA manager
-from config import INPUT_NEURONS, HIDDEN_NEURONS, OUTPUT_NEURONS, BEST_NN_FILE, BLACK, WHITE
-
-def display_menu(screen, font_style):
-    screen.fill(BLACK)
-    title = font_style.render("Jogo da Cobrinha IA", True, WHITE)
-    option1 = font_style.render("1. Ver IA Treinando", True, WHITE)
-    option2 = font_style.render("2. Jogar Sozinho", True, WHITE)
-    option3 = font_style.render("3. Jogar Contra IA", True, WHITE)
-    option4 = font_style.render("4. Treinar IA (Algoritmo Genético)", True, WHITE) # New option
-    option5 = font_style.render("5. Sair", True, WHITE) # Adjusted option
-
-    screen.blit(title, title.get_rect(center=(screen.get_width() / 2, screen.get_height() / 2 - 120)))
-    screen.blit(option1, option1.get_rect(center=(screen.get_width() / 2, screen.get_height() / 2 - 50)))
-    screen.blit(option2, option2.get_rect(center=(screen.get_width() / 2, screen.get_height() / 2 - 10)))
-    screen.blit(option3, option3.get_rect(center=(screen.get_width() / 2, screen.get_height() / 2 + 30)))
-    screen.blit(option4, option4.get_rect(center=(screen.get_width() / 2, screen.get_height() / 2 + 70)))
-    screen.blit(option5, option5.get_rect(center=(screen.get_width() / 2, screen.get_height() / 2 + 110)))
-    pygame.display.update()
+from config import (INPUT_NEURONS, HIDDEN_NEURONS, OUTPUT_NEURONS, BEST_NN_FILE, LEGACY_BEST_NN_FILE,
+                    CHECKPOINT_FILE, COMPILE_POLICY, SENSOR_PACK, BLACK, WHITE)
+
+def playing_model(nn_model):
+    # Watching and playing never change the weights, so the network can be compiled into a table
+    return CompiledPolicy(nn_model) if COMPILE_POLICY and SENSOR_PACK == 'basic' else nn_model
 
 def main():
+    # The menu is the only part that needs pygame up front
+    import pygame
+    from renderer import display_menu
+
     pygame.init()
     screen_width = 600
     screen_height = 400
@@ -32,7 +25,9 @@ def main():
 
     # Load the neural network once for modes 1 and 3
     nn_model_for_play = NeuralNetwork(INPUT_NEURONS, HIDDEN_NEURONS, OUTPUT_NEURONS)
-    nn_model_for_play.load(BEST_NN_FILE) # Tries to load the "trained" network (if it exists)
+    # Tries to load the "trained" network (if it exists), falling back to the old pickle file
+    if not nn_model_for_play.load(BEST_NN_FILE):
+        nn_model_for_play.load(LEGACY_BEST_NN_FILE)
 
     running = True
     while running:
@@ -44,7 +39,7 @@ def main():
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_1:
                     # Option 1: Watch AI Playing
-                    game = Game(mode='ai_watch', nn_model=nn_model_for_play)
+                    game = Game(mode='ai_watch', nn_model=playing_model(nn_model_for_play))
                     game.run()
                     # After game, re-init pygame to avoid display issues from closing/reopening
                     pygame.quit()
@@ -65,7 +60,7 @@ def main():
 
                 elif event.key == pygame.K_3:
                     # Option 3: Play Against AI
-                    game = Game(mode='human_vs_ai', nn_model=nn_model_for_play)
+                    game = Game(mode='human_vs_ai', nn_model=playing_model(nn_model_for_play))
                     game.run()
                     pygame.quit()
                     pygame.init()
@@ -73,22 +68,38 @@ def main():
                     pygame.display.set_caption("Menu Principal")
                     font_style = pygame.font.SysFont("bahnschrift", 30)
 
-                elif event.key == pygame.K_4:
-                    # Option 4: Train AI (Genetic Algorithm)
+                elif event.key in (pygame.K_4, pygame.K_5):
+                    # Option 4: Train AI (Genetic Algorithm), Option 5: Continue training from the checkpoint
+                    resume = event.key == pygame.K_5
                     pygame.display.set_caption("Treinamento da IA (Algoritmo Genético)")
                     screen.fill(BLACK)
-                    training_msg = font_style.render("Iniciando Treinamento da IA...", True, WHITE)
+                    training_msg = font_style.render("Continuando Treinamento da IA..." if resume
+                                                     else "Iniciando Treinamento da IA...", True, WHITE)
                     screen.blit(training_msg, training_msg.get_rect(center=(screen.get_width() / 2, screen.get_height() / 2)))
                     pygame.display.update()
 
                     # Important: Quit Pygame display before starting headless training
                     pygame.quit()
 
-                    ga_manager = GeneticAlgorithmManager()
+                    ga_manager = None
+                    if resume:
+                        if not os.path.exists(CHECKPOINT_FILE):
+                            print(f"Nenhum checkpoint em {CHECKPOINT_FILE}: iniciando um novo treinamento.")
+                        else:
+                            try:
+                                ga_manager = GeneticAlgorithmManager.resume(CHECKPOINT_FILE)
+                            except ValueError as error:
+                                # The checkpoint belongs to other settings (network size, sensors, ...)
+                                print(f"Não foi possível continuar de {CHECKPOINT_FILE} ({error}): "
+                                      "iniciando um novo treinamento.")
+                    if ga_manager is None:
+                        ga_manager = GeneticAlgorithmManager(checkpoint_file=CHECKPOINT_FILE)
                     NUM_GENERATIONS = 100 # Example: Train for 100 generations
 
-                    for generation_num in range(NUM_GENERATIONS):
-                        ga_manager.run_generation()
+                    with ga_manager:
+                        for generation_num in range(NUM_GENERATIONS):
+                            ga_manager.run_generation()
+                        ga_manager.save_checkpoint()
 
                     print("\nTreinamento Concluído!")
                     # After training, re-initialize Pygame for the menu
@@ -99,8 +110,8 @@ def main():
                     # Reload the best NN model after training
                     nn_model_for_play.load(BEST_NN_FILE)
 
-                elif event.key == pygame.K_5:
-                    # Option 5: Exit
+                elif event.key == pygame.K_6:
+                    # Option 6: Exit
                     running = False
 
     pygame.quit()
@@ -0,0 +1,160 @@
+# File: model_io.py
+
+import struct
+import zlib
+import numpy as np
+# Import settings from config.py
+from config import INPUT_NEURONS, HIDDEN_NEURONS, OUTPUT_NEURONS
+
+# Binary model format, for one network or a whole population:
+#   header (little endian): magic, format version, dtype code, number of layer sizes,
+#                           number of networks, genome length, CRC32 of the data, data offset
+#   layer sizes:            one uint32 per layer (input, hidden, output)
+#   scales:                 int8 files only: (count, 2 * (layers - 1)) float32, one scale per
+#                           weight matrix and bias vector of each network (see quantize_genomes)
+#   data:                   count x genome_length raw values, starting at a 64-byte aligned offset
+# The data is a plain row-major (count, genome_length) array, so it can be np.memmap'd.
+# The CRC32 covers the scales and the data.
+MAGIC = b'SNAKENN\0'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<8sHBBIIII')
+DATA_ALIGNMENT = 64
+CRC_CHUNK_BYTES = 1 << 24 # The CRC is computed in chunks this size, straight from the array's memory
+
+DTYPE_CODES = {np.dtype(np.float32): 1, np.dtype(np.float64): 2, np.dtype(np.int8): 3}
+CODE_DTYPES = {code: dtype for dtype, code in DTYPE_CODES.items()}
+
+class ModelFormatError(ValueError):
+    pass
+
+def _crc32(array, value=0):
+    # CRC32 of a C-contiguous array without copying it (tobytes() would copy a whole memmap)
+    data = memoryview(array).cast('B')
+    for start in range(0, len(data), CRC_CHUNK_BYTES):
+        value = zlib.crc32(data[start:start + CRC_CHUNK_BYTES], value)
+    return value
+
+def is_model_file(filename):
+    # True if the file starts with this format's magic (False for legacy pickle files)
+    with open(filename, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+def save_genomes(filename, genomes, layer_sizes=(INPUT_NEURONS, HIDDEN_NEURONS, OUTPUT_NEURONS), scales=None):
+    # Writes a (count, G) genome matrix (or a single flat genome) with its header.
+    # int8 genomes (from quantize_genomes) need their scales.
+    genomes = np.ascontiguousarray(genomes)
+    if genomes.ndim == 1:
+        genomes = genomes[np.newaxis, :]
+    if genomes.dtype not in DTYPE_CODES:
+        genomes = genomes.astype(np.float32)
+    if genomes.dtype == np.int8:
+        if scales is None:
+            raise ModelFormatError("int8 genomes need their quantization scales.")
+        scale_data = np.ascontiguousarray(scales, dtype='<f4').reshape(len(genomes), 2 * (len(layer_sizes) - 1)).tobytes()
+    else:
+        scale_data = b''
+    data = genomes.tobytes()
+
+    header_size = HEADER.size + 4 * len(layer_sizes) + len(scale_data)
+    data_offset = -(-header_size // DATA_ALIGNMENT) * DATA_ALIGNMENT
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, DTYPE_CODES[genomes.dtype], len(layer_sizes),
+                         genomes.shape[0], genomes.shape[1], zlib.crc32(data, zlib.crc32(scale_data)), data_offset)
+
+    with open(filename, 'wb') as f:
+        f.write(header)
+        f.write(struct.pack(f'<{len(layer_sizes)}I', *layer_sizes))
+        f.write(scale_data)
+        f.write(b'\0' * (data_offset - header_size))
+        f.write(data)
+
+def read_header(filename):
+    # Returns (dtype, layer_sizes, count, genome_length, checksum, data_offset)
+    with open(filename, 'rb') as f:
+        raw = f.read(HEADER.size)
+        if len(raw) < HEADER.size:
+            raise ModelFormatError(f"{filename} is too short to be a model file.")
+        magic, version, dtype_code, num_sizes, count, genome_length, checksum, data_offset = HEADER.unpack(raw)
+        if magic != MAGIC:
+            raise ModelFormatError(f"{filename} is not a model file.")
+        if version != FORMAT_VERSION:
+            raise ModelFormatError(f"{filename} has format version {version}, expected {FORMAT_VERSION}.")
+        if dtype_code not in CODE_DTYPES:
+            raise ModelFormatError(f"{filename} has an unknown dtype code {dtype_code}.")
+        layer_sizes = struct.unpack(f'<{num_sizes}I', f.read(4 * num_sizes))
+    return CODE_DTYPES[dtype_code], layer_sizes, count, genome_length, checksum, data_offset
+
+def _read_scales(filename, layer_sizes, count):
+    with open(filename, 'rb') as f:
+        f.seek(HEADER.size + 4 * len(layer_sizes))
+        num_scales = count * 2 * (len(layer_sizes) - 1)
+        scales = np.frombuffer(f.read(4 * num_scales), dtype='<f4', count=num_scales)
+    return scales.reshape(count, -1).astype(np.float32)
+
+def load_genomes(filename, mmap=True, verify=True):
+    # Returns ((count, G) genome matrix, layer_sizes).
+    # With mmap the matrix is a read-only np.memmap: loading is instant and processes
+    # opening the same file share its pages. verify checks the CRC32 (this reads the data, but copies nothing).
+    # int8 files are dequantized to float32 (see load_quantized to keep them int8).
+    dtype, layer_sizes, count, genome_length, checksum, data_offset = read_header(filename)
+    if dtype == np.int8:
+        genomes, scales, layer_sizes = load_quantized(filename, verify)
+        return dequantize_genomes(genomes, scales, layer_sizes), layer_sizes
+    shape = (count, genome_length)
+    if mmap:
+        genomes = np.memmap(filename, dtype=dtype, mode='r', offset=data_offset, shape=shape)
+    else:
+        with open(filename, 'rb') as f:
+            f.seek(data_offset)
+            genomes = np.frombuffer(f.read(), dtype=dtype, count=count * genome_length).reshape(shape).copy()
+    if verify and _crc32(genomes) != checksum:
+        raise ModelFormatError(f"{filename} is corrupted (checksum mismatch).")
+    return genomes, layer_sizes
+
+def load_quantized(filename, verify=True):
+    # Returns ((count, G) int8 genomes, (count, 2 * (layers - 1)) scales, layer_sizes)
+    dtype, layer_sizes, count, genome_length, checksum, data_offset = read_header(filename)
+    if dtype != np.int8:
+        raise ModelFormatError(f"{filename} does not hold int8 networks.")
+    scales = _read_scales(filename, layer_sizes, count)
+    with open(filename, 'rb') as f:
+        f.seek(data_offset)
+        genomes = np.frombuffer(f.read(), dtype=np.int8, count=count * genome_length).reshape(count, genome_length).copy()
+    if verify and _crc32(genomes, zlib.crc32(scales.astype('<f4').tobytes())) != checksum:
+        raise ModelFormatError(f"{filename} is corrupted (checksum mismatch).")
+    return genomes, scales, layer_sizes
+
+
+# --- int8 quantization ---
+# Every weight matrix and bias vector of a network gets its own symmetric scale:
+# value ~= int8 value * scale, with the largest magnitude mapped to 127.
+
+def segment_lengths(layer_sizes):
+    # Lengths of the W, b segments of a flat genome (W1, b1, W2, b2 for one hidden layer)
+    lengths = []
+    for inputs, outputs in zip(layer_sizes[:-1], layer_sizes[1:]):
+        lengths += [inputs * outputs, outputs]
+    return lengths
+
+def quantize_genomes(genomes, layer_sizes=(INPUT_NEURONS, HIDDEN_NEURONS, OUTPUT_NEURONS)):
+    # (count, G) float genomes -> ((count, G) int8 genomes, (count, segments) float32 scales)
+    genomes = np.atleast_2d(np.asarray(genomes, dtype=np.float32))
+    quantized = np.empty(genomes.shape, dtype=np.int8)
+    scales = np.empty((len(genomes), len(segment_lengths(layer_sizes))), dtype=np.float32)
+    start = 0
+    for i, length in enumerate(segment_lengths(layer_sizes)):
+        segment = genomes[:, start:start + length]
+        scale = np.abs(segment).max(axis=1) / 127
+        scale[scale == 0] = 1 # All-zero segment
+        quantized[:, start:start + length] = np.clip(np.rint(segment / scale[:, np.newaxis]), -127, 127)
+        scales[:, i] = scale
+        start += length
+    return quantized, scales
+
+def dequantize_genomes(quantized, scales, layer_sizes=(INPUT_NEURONS, HIDDEN_NEURONS, OUTPUT_NEURONS)):
+    # Inverse of quantize_genomes, as float32
+    genomes = quantized.astype(np.float32)
+    start = 0
+    for i, length in enumerate(segment_lengths(layer_sizes)):
+        genomes[:, start:start + length] *= scales[:, i:i + 1]
+        start += length
+    return genomes
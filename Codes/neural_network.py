@@ -3,27 +3,79 @@
 import numpy as np
 import pickle
 import os
+from model_io import (save_genomes, load_genomes, load_quantized, quantize_genomes, dequantize_genomes,
+                      is_model_file, ModelFormatError)
 # Import settings from config.py
-from config import INPUT_NEURONS, HIDDEN_NEURONS, OUTPUT_NEURONS
+from config import INPUT_NEURONS, HIDDEN_NEURONS, OUTPUT_NEURONS, NN_DTYPE
+
+def genome_size(input_size=INPUT_NEURONS, hidden_size=HIDDEN_NEURONS, output_size=OUTPUT_NEURONS):
+    # Number of values in a flat genome: W1, b1, W2 and b2 back to back
+    return input_size * hidden_size + hidden_size + hidden_size * output_size + output_size
+
+def split_genome(genome, input_size=INPUT_NEURONS, hidden_size=HIDDEN_NEURONS, output_size=OUTPUT_NEURONS):
+    # Views of (W1, b1, W2, b2) inside a flat genome, or a (P, G) matrix of genomes
+    batch = genome.shape[:-1]
+    end_W1 = input_size * hidden_size
+    end_b1 = end_W1 + hidden_size
+    end_W2 = end_b1 + hidden_size * output_size
+    W1 = genome[..., :end_W1].reshape(batch + (input_size, hidden_size))
+    b1 = genome[..., end_W1:end_b1].reshape(batch + (1, hidden_size))
+    W2 = genome[..., end_b1:end_W2].reshape(batch + (hidden_size, output_size))
+    b2 = genome[..., end_W2:].reshape(batch + (1, output_size))
+    return (W1, b1, W2, b2)
+
+def initialize_genomes(genomes, rng, input_size=INPUT_NEURONS, hidden_size=HIDDEN_NEURONS, output_size=OUTPUT_NEURONS):
+    # Fills flat genomes in place the same way NeuralNetwork initializes its weights
+    W1, b1, W2, b2 = split_genome(genomes, input_size, hidden_size, output_size)
+    W1[...] = rng.standard_normal(W1.shape) * 0.01
+    b1[...] = 0
+    W2[...] = rng.standard_normal(W2.shape) * 0.01
+    b2[...] = 0
 
 class NeuralNetwork:
-    def __init__(self, input_size, hidden_size, output_size):
+    def __init__(self, input_size, hidden_size, output_size, genome=None):
         self.input_size = input_size
         self.hidden_size = hidden_size
         self.output_size = output_size
+        self.forward_buffers = None # (hidden, output) arrays reused by forward()
+
+        if genome is not None:
+            # Zero-copy view into an existing flat genome (e.g. a row of the GA's genome matrix)
+            self.set_flat_weights(genome)
+            return
 
         # Initialize weights and biases with small random values
-        self.W1 = np.random.randn(self.input_size, self.hidden_size) * 0.01
-        self.b1 = np.zeros((1, self.hidden_size))
-        self.W2 = np.random.randn(self.hidden_size, self.output_size) * 0.01
-        self.b2 = np.zeros((1, self.output_size))
+        self.W1 = (np.random.randn(self.input_size, self.hidden_size) * 0.01).astype(NN_DTYPE)
+        self.b1 = np.zeros((1, self.hidden_size), dtype=NN_DTYPE)
+        self.W2 = (np.random.randn(self.hidden_size, self.output_size) * 0.01).astype(NN_DTYPE)
+        self.b2 = np.zeros((1, self.output_size), dtype=NN_DTYPE)
 
     def forward(self, inputs):
-        # Implements the feedforward pass of the neural network
-        z1 = np.dot(inputs, self.W1) + self.b1
-        a1 = np.maximum(0, z1) # ReLU activation function
-        z2 = np.dot(a1, self.W2) + self.b2
-        return z2
+        # Implements the feedforward pass of the neural network, in the weights' precision.
+        # Returns a preallocated output buffer, overwritten on the next call.
+        dtype = self.W1.dtype
+        if inputs.dtype != dtype:
+            inputs = inputs.astype(dtype)
+        hidden, outputs = self._buffers(len(inputs), dtype)
+        np.dot(inputs, self.W1, out=hidden)
+        hidden += self.b1
+        np.maximum(hidden, 0, out=hidden) # ReLU activation function
+        np.dot(hidden, self.W2, out=outputs)
+        outputs += self.b2
+        return outputs
+
+    def _buffers(self, batch_size, dtype):
+        # Hidden and output arrays for this batch size, reused between calls
+        buffers = self.forward_buffers
+        if buffers is None or buffers[1].shape[0] != batch_size or buffers[1].dtype != dtype:
+            buffers = (np.empty((batch_size, self.hidden_size), dtype=dtype),
+                       np.empty((batch_size, self.output_size), dtype=dtype))
+            self.forward_buffers = buffers
+        return buffers
+
+    def quantize(self):
+        # int8 copy of this network for inference (see QuantizedNetwork)
+        return QuantizedNetwork.from_genome(self.get_flat_weights(), (self.input_size, self.hidden_size, self.output_size))
 
     def get_weights(self):
         # Returns the network's weights and biases (the snake's "genes")
@@ -37,24 +89,208 @@ class NeuralNetwork:
         self.W2 = W2
         self.b2 = b2
 
+    def get_flat_weights(self):
+        # All weights and biases as one flat genome (a copy)
+        return np.concatenate([w.ravel() for w in self.get_weights()])
+
+    def set_flat_weights(self, genome):
+        # Uses views into the flat genome, so the network shares memory with it
+        self.set_weights(split_genome(genome, self.input_size, self.hidden_size, self.output_size))
+
     def save(self, filename):
-        # Saves the network's weights to a file
-        with open(filename, 'wb') as f:
-            pickle.dump(self.get_weights(), f)
+        # Saves the network's weights to a file (binary model format, float32; see model_io.py)
+        save_genomes(filename, self.get_flat_weights().astype(np.float32),
+                     (self.input_size, self.hidden_size, self.output_size))
         print(f"Neural network saved to {filename}")
 
-    def load(self, filename):
-        # Loads the network's weights from a file
+    def load(self, filename, mmap=False):
+        # Loads the network's weights from a file. Files in the old pickle format still load.
+        # With mmap the weights stay a read-only view of the file (shared between processes).
         if os.path.exists(filename):
-            with open(filename, 'rb') as f:
-                weights = pickle.load(f)
-            self.set_weights(weights)
+            if is_model_file(filename):
+                genomes, layer_sizes = load_genomes(filename, mmap=mmap) # int8 files come back as float32
+                if tuple(layer_sizes) != (self.input_size, self.hidden_size, self.output_size):
+                    raise ModelFormatError(f"{filename} holds a {layer_sizes} network, expected "
+                                           f"{(self.input_size, self.hidden_size, self.output_size)}.")
+                self.set_flat_weights(genomes[0])
+            else:
+                # Legacy pickle file: only load these from sources you trust
+                with open(filename, 'rb') as f:
+                    weights = pickle.load(f)
+                self.set_weights(weights)
             print(f"Neural network loaded from {filename}")
             return True
         else:
             # print(f"File {filename} not found.") # Removed for cleaner output on first run
             return False
 
+class PopulationNetwork:
+    # Holds the weights of a whole population stacked along a leading axis,
+    # so a single matmul runs every individual's network at once
+    def __init__(self, population_size, input_size, hidden_size, output_size):
+        self.population_size = population_size
+        self.input_size = input_size
+        self.hidden_size = hidden_size
+        self.output_size = output_size
+
+        # Same initialization as NeuralNetwork, one slice per individual
+        self.W1 = (np.random.randn(population_size, input_size, hidden_size) * 0.01).astype(NN_DTYPE)
+        self.b1 = np.zeros((population_size, 1, hidden_size), dtype=NN_DTYPE)
+        self.W2 = (np.random.randn(population_size, hidden_size, output_size) * 0.01).astype(NN_DTYPE)
+        self.b2 = np.zeros((population_size, 1, output_size), dtype=NN_DTYPE)
+        self.all_ids = np.arange(population_size)
+        self.forward_buffers = None # Arrays reused by forward(), see _buffers
+
+    @classmethod
+    def from_networks(cls, networks):
+        # Stacks the weights of a list of NeuralNetwork objects (copies them)
+        first = networks[0]
+        population = cls(len(networks), first.input_size, first.hidden_size, first.output_size)
+        population.W1 = np.stack([nn.W1 for nn in networks])
+        population.b1 = np.stack([nn.b1 for nn in networks])
+        population.W2 = np.stack([nn.W2 for nn in networks])
+        population.b2 = np.stack([nn.b2 for nn in networks])
+        return population
+
+    @classmethod
+    def from_genomes(cls, genomes, input_size=INPUT_NEURONS, hidden_size=HIDDEN_NEURONS, output_size=OUTPUT_NEURONS):
+        # Wraps a (P, G) genome matrix; the stacked weights are views into it (no copy)
+        population = cls.__new__(cls)
+        population.population_size = genomes.shape[0]
+        population.input_size = input_size
+        population.hidden_size = hidden_size
+        population.output_size = output_size
+        population.W1, population.b1, population.W2, population.b2 = split_genome(
+            genomes, input_size, hidden_size, output_size)
+        population.all_ids = np.arange(population.population_size)
+        population.forward_buffers = None
+        return population
+
+    @classmethod
+    def load(cls, filename, mmap=True):
+        # Opens a population archive written with model_io.save_genomes (memory-mapped by default)
+        genomes, layer_sizes = load_genomes(filename, mmap=mmap)
+        return cls.from_genomes(genomes, *layer_sizes)
+
+    def forward(self, inputs, ids=None):
+        # inputs: (P, input_size), one row per individual -> outputs: (P, output_size)
+        # If ids is given, only those individuals are run and inputs has one row per id.
+        # Returns a preallocated output buffer, overwritten on the next call.
+        dtype = self.W1.dtype
+        if inputs.dtype != dtype:
+            inputs = inputs.astype(dtype)
+        if ids is not None and len(ids) == self.population_size and np.array_equal(ids, self.all_ids):
+            ids = None # Every individual in order: use the stacked weights directly
+        batch_size = len(inputs)
+        hidden, outputs, gathered = self._buffers(batch_size, dtype, ids is not None)
+        if ids is None:
+            W1, b1, W2, b2 = self.W1, self.b1, self.W2, self.b2
+        else:
+            # Gather the weights of the requested individuals into reused arrays
+            W1, b1, W2, b2 = gathered
+            np.take(self.W1, ids, axis=0, out=W1, mode='clip')
+            np.take(self.b1, ids, axis=0, out=b1, mode='clip')
+            np.take(self.W2, ids, axis=0, out=W2, mode='clip')
+            np.take(self.b2, ids, axis=0, out=b2, mode='clip')
+        np.matmul(inputs[:, np.newaxis, :], W1, out=hidden)
+        hidden += b1
+        np.maximum(hidden, 0, out=hidden) # ReLU activation function
+        np.matmul(hidden, W2, out=outputs)
+        outputs += b2
+        return outputs[:, 0, :]
+
+    def _buffers(self, batch_size, dtype, gather):
+        # Arrays for at least batch_size rows, reused between calls: the hidden and output
+        # activations, plus the gathered (W1, b1, W2, b2) when ids are given. The batch shrinks
+        # as games end, so they only grow and each call uses their first batch_size rows.
+        buffers = self.forward_buffers
+        if (buffers is None or buffers[0].dtype != dtype or len(buffers[0]) < batch_size
+                or (gather and buffers[2] is None)):
+            capacity = batch_size if buffers is None else max(batch_size, len(buffers[0]))
+            weight_shapes = ((self.input_size, self.hidden_size), (1, self.hidden_size),
+                             (self.hidden_size, self.output_size), (1, self.output_size))
+            buffers = (np.empty((capacity, 1, self.hidden_size), dtype=dtype),
+                       np.empty((capacity, 1, self.output_size), dtype=dtype),
+                       tuple(np.empty((capacity,) + shape, dtype=dtype) for shape in weight_shapes) if gather else None)
+            self.forward_buffers = buffers
+        hidden, outputs, gathered = buffers
+        if gather:
+            gathered = tuple(array[:batch_size] for array in gathered)
+        return hidden[:batch_size], outputs[:batch_size], gathered
+
+    def get_weights(self, index):
+        # Views into the stacked arrays, shaped like NeuralNetwork.get_weights()
+        return (self.W1[index], self.b1[index], self.W2[index], self.b2[index])
+
+    def set_weights(self, index, weights):
+        # Copies one individual's weights into the stacked arrays
+        W1, b1, W2, b2 = weights
+        self.W1[index] = W1
+        self.b1[index] = b1
+        self.W2[index] = W2
+        self.b2[index] = b2
+
+    def network(self, index):
+        # A NeuralNetwork sharing memory with this individual's slice (no copy)
+        nn = NeuralNetwork(self.input_size, self.hidden_size, self.output_size)
+        nn.set_weights(self.get_weights(index))
+        return nn
+
+class QuantizedNetwork:
+    # Inference-only network with int8 weights and one float32 scale per weight matrix and bias
+    # vector (model_io.quantize_genomes): a quarter of the float32 size. Activations stay float32;
+    # each matmul result is scaled back before the bias and ReLU.
+    def __init__(self, quantized, scales, layer_sizes=(INPUT_NEURONS, HIDDEN_NEURONS, OUTPUT_NEURONS)):
+        self.input_size, self.hidden_size, self.output_size = layer_sizes
+        self.quantized = quantized # Flat int8 genome
+        self.scales = scales # W1, b1, W2, b2
+        self.W1, b1, self.W2, b2 = split_genome(quantized, *layer_sizes)
+        self.b1 = b1.astype(NN_DTYPE) * scales[1]
+        self.b2 = b2.astype(NN_DTYPE) * scales[3]
+        self.scale1 = NN_DTYPE(scales[0])
+        self.scale2 = NN_DTYPE(scales[2])
+        self.forward_buffers = None
+
+    @classmethod
+    def from_genome(cls, genome, layer_sizes=(INPUT_NEURONS, HIDDEN_NEURONS, OUTPUT_NEURONS)):
+        quantized, scales = quantize_genomes(genome[np.newaxis, :], layer_sizes)
+        return cls(quantized[0], scales[0], layer_sizes)
+
+    @classmethod
+    def load(cls, filename):
+        # First network of an int8 model file
+        quantized, scales, layer_sizes = load_quantized(filename)
+        return cls(quantized[0], scales[0], layer_sizes)
+
+    def save(self, filename):
+        save_genomes(filename, self.quantized, (self.input_size, self.hidden_size, self.output_size),
+                     scales=self.scales[np.newaxis, :])
+        print(f"Quantized neural network saved to {filename}")
+
+    def to_network(self):
+        # float32 NeuralNetwork with the dequantized weights
+        layer_sizes = (self.input_size, self.hidden_size, self.output_size)
+        genome = dequantize_genomes(self.quantized[np.newaxis, :], self.scales[np.newaxis, :], layer_sizes)[0]
+        return NeuralNetwork(*layer_sizes, genome=genome)
+
+    def forward(self, inputs):
+        # Same interface as NeuralNetwork.forward (preallocated output buffer, overwritten on the next call)
+        if inputs.dtype != NN_DTYPE:
+            inputs = inputs.astype(NN_DTYPE)
+        batch_size = len(inputs)
+        if self.forward_buffers is None or self.forward_buffers[1].shape[0] != batch_size:
+            self.forward_buffers = (np.empty((batch_size, self.hidden_size), dtype=NN_DTYPE),
+                                    np.empty((batch_size, self.output_size), dtype=NN_DTYPE))
+        hidden, outputs = self.forward_buffers
+        np.matmul(inputs, self.W1, out=hidden)
+        hidden *= self.scale1
+        hidden += self.b1
+        np.maximum(hidden, 0, out=hidden) # ReLU activation function
+        np.matmul(hidden, self.W2, out=outputs)
+        outputs *= self.scale2
+        outputs += self.b2
+        return outputs
+
 # Sigmoid activation function (optional, depending on desired output)
 # def sigmoid(x):
 #     return 1 / (1 + np.exp(-x))
@@ -0,0 +1,103 @@
+# File: profiler.py
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+# Optional per-phase timing for the game loop and the GA. Off by default; switch it on with
+# the environment variable SNAKE_PROFILE=1 or PROFILER.enable() (train.py --profile).
+# Instrumented code keeps `profiler = PROFILER if PROFILER.enabled else None` and only calls
+# it behind `if profiler:`, so a disabled profiler costs one check per phase.
+
+class Profiler:
+    def __init__(self, enabled=False, max_events=1000000):
+        self.enabled = enabled
+        self.max_events = max_events # Trace events kept; totals keep counting after that
+        self.reset()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        self.totals = defaultdict(float) # (category, phase) -> seconds
+        self.calls = defaultdict(int) # (category, phase) -> times measured
+        self.counters = defaultdict(int) # name -> count
+        self.events = [] # (category, phase, start, end, thread id) for the Chrome trace
+        self.dropped_events = 0
+        self.merged_events = [] # (pid, events) of other processes, see merge()
+        self.origin = time.perf_counter()
+
+    def lap(self, category, phase, start, end=None):
+        # Records a phase that started at `start` (a time.perf_counter() value) and ends now
+        # (or at `end`). Returns the end time, which is the start of the next phase.
+        if end is None:
+            end = time.perf_counter()
+        key = (category, phase)
+        self.totals[key] += end - start
+        self.calls[key] += 1
+        if len(self.events) < self.max_events:
+            self.events.append((category, phase, start, end, threading.get_ident()))
+        else:
+            self.dropped_events += 1
+        return end
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def state(self):
+        # Picklable copy of what this process recorded, to merge() into another process's profiler
+        return {'pid': os.getpid(), 'totals': dict(self.totals), 'calls': dict(self.calls),
+                'counters': dict(self.counters), 'events': list(self.events),
+                'dropped_events': self.dropped_events}
+
+    def merge(self, state):
+        # Adds another process's state() (e.g. an island's, island_model.py). perf_counter is a
+        # system-wide clock, so its trace events line up with this process's own.
+        for key, seconds in state['totals'].items():
+            self.totals[key] += seconds
+        for key, calls in state['calls'].items():
+            self.calls[key] += calls
+        for name, value in state['counters'].items():
+            self.counters[name] += value
+        self.merged_events.append((state['pid'], state['events']))
+        self.dropped_events += state['dropped_events']
+
+    def summary(self):
+        # Plain-text table: time per phase, slowest first, with its share of its category
+        category_totals = defaultdict(float)
+        for (category, phase), seconds in self.totals.items():
+            category_totals[category] += seconds
+
+        lines = [f"{'category':<6} {'phase':<10} {'calls':>10} {'total s':>10} {'mean us':>10} {'share':>7}"]
+        for (category, phase), seconds in sorted(self.totals.items(), key=lambda item: (item[0][0], -item[1])):
+            calls = self.calls[(category, phase)]
+            share = seconds / category_totals[category] if category_totals[category] else 0.0
+            lines.append(f"{category:<6} {phase:<10} {calls:>10} {seconds:>10.4f} "
+                         f"{seconds / calls * 1e6:>10.2f} {share:>7.1%}")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"counter {name}: {value}")
+        if self.dropped_events:
+            lines.append(f"({self.dropped_events} events not kept in the trace)")
+        return "\n".join(lines)
+
+    def write_chrome_trace(self, filename):
+        # Trace Event Format, viewable in chrome://tracing or https://ui.perfetto.dev
+        pid = os.getpid()
+        trace_events = [{'name': phase, 'cat': category, 'ph': 'X', 'pid': event_pid, 'tid': tid,
+                         'ts': (start - self.origin) * 1e6, 'dur': (end - start) * 1e6}
+                        for event_pid, events in [(pid, self.events)] + self.merged_events
+                        for category, phase, start, end, tid in events]
+        for name, value in self.counters.items():
+            trace_events.append({'name': name, 'ph': 'C', 'pid': pid, 'tid': 0,
+                                 'ts': (time.perf_counter() - self.origin) * 1e6, 'args': {name: value}})
+        with open(filename, 'w') as f:
+            json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms'}, f)
+
+
+# One profiler per process
+PROFILER = Profiler(enabled=os.environ.get('SNAKE_PROFILE', '') not in ('', '0'))
@@ -0,0 +1,60 @@
+# File: quantize.py
+
+# Exports a trained network as int8 (one scale per weight matrix and bias vector, a quarter of
+# the float32 size) after checking that it still plays the same: the float network plays some
+# headless games, every state it sees is recorded, and the argmax decisions of both networks
+# are compared on those states.
+# Usage: python quantize.py [--input FILE] [--output FILE] [--games N] [--min-agreement F] [--seed S]
+
+import argparse
+import os
+import sys
+import numpy as np
+from neural_network import NeuralNetwork
+from simulation import Simulation
+from termination import TerminationPolicy
+from config import (INPUT_NEURONS, HIDDEN_NEURONS, OUTPUT_NEURONS, BEST_NN_FILE, QUANTIZED_NN_FILE,
+                    QUANTIZE_MIN_AGREEMENT)
+
+def record_states(nn_model, num_games, rng=None, termination=None):
+    # Plays headless 'ai_watch' games with nn_model; returns every input it decided on, (n, INPUT_NEURONS)
+    rng = rng if rng is not None else np.random.default_rng()
+    termination = termination if termination is not None else TerminationPolicy()
+    states = []
+    for _ in range(num_games):
+        game_sim = Simulation(mode='ai_watch', nn_model=nn_model, random_start=True, termination=termination, rng=rng)
+        while not game_sim.game_over:
+            states.append(game_sim.ai_snake.get_state_for_nn(game_sim.food.get_pos())[0].copy())
+            game_sim.step()
+    return np.array(states)
+
+def decision_agreement(reference, candidate, states):
+    # Fraction of states on which both networks pick the same action
+    expected = np.argmax(reference.forward(states), axis=1)
+    return float(np.mean(np.argmax(candidate.forward(states), axis=1) == expected))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the trained network as int8 and check its decisions.")
+    parser.add_argument('--input', default=BEST_NN_FILE, help="float network (default: %(default)s)")
+    parser.add_argument('--output', default=QUANTIZED_NN_FILE, help="int8 network (default: %(default)s)")
+    parser.add_argument('--games', type=int, default=20, help="games to record states from (default: %(default)s)")
+    parser.add_argument('--min-agreement', type=float, default=QUANTIZE_MIN_AGREEMENT,
+                        help="do not write the export below this decision agreement (default: %(default)s)")
+    parser.add_argument('--seed', type=int, default=None, help="random seed (default: random)")
+    args = parser.parse_args(argv)
+
+    nn_model = NeuralNetwork(INPUT_NEURONS, HIDDEN_NEURONS, OUTPUT_NEURONS)
+    if not nn_model.load(args.input):
+        sys.exit(f"{args.input} not found.")
+    quantized = nn_model.quantize()
+
+    states = record_states(nn_model, args.games, np.random.default_rng(args.seed))
+    agreement = decision_agreement(nn_model, quantized, states)
+    print(f"Decisions agree on {agreement:.2%} of {len(states)} recorded states.")
+    if agreement < args.min_agreement:
+        sys.exit(f"Below {args.min_agreement:.2%}: {args.output} not written.")
+    quantized.save(args.output)
+    print(f"{os.path.getsize(args.input)} -> {os.path.getsize(args.output)} bytes")
+
+if __name__ == "__main__":
+    main()
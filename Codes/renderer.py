@@ -0,0 +1,219 @@
+# File: renderer.py
+
+# Everything that needs pygame lives here. The simulation modules only import this
+# when something is actually drawn, so headless training never loads pygame.
+import pygame
+from config import (BLOCK_SIZE, SCREEN_WIDTH, SCREEN_HEIGHT, BLACK, WHITE, GREEN, PURPLE, BLUE,
+                    UP, DOWN, LEFT, RIGHT)
+
+# Arrow keys -> snake directions
+KEY_DIRECTIONS = {
+    pygame.K_LEFT: LEFT,
+    pygame.K_RIGHT: RIGHT,
+    pygame.K_UP: UP,
+    pygame.K_DOWN: DOWN,
+}
+
+def draw_snake(screen, snake):
+    if not snake.is_alive:
+        return
+    for segment in snake.body:
+        pygame.draw.rect(screen, snake.color, [segment[0], segment[1], BLOCK_SIZE, BLOCK_SIZE])
+
+def draw_food(screen, food):
+    pygame.draw.rect(screen, BLUE, [food.position[0], food.position[1], BLOCK_SIZE, BLOCK_SIZE])
+
+def display_menu(screen, font_style):
+    screen.fill(BLACK)
+    title = font_style.render("Jogo da Cobrinha IA", True, WHITE)
+    option1 = font_style.render("1. Ver IA Treinando", True, WHITE)
+    option2 = font_style.render("2. Jogar Sozinho", True, WHITE)
+    option3 = font_style.render("3. Jogar Contra IA", True, WHITE)
+    option4 = font_style.render("4. Treinar IA (Algoritmo Genético)", True, WHITE) # New option
+    option5 = font_style.render("5. Continuar Treinamento", True, WHITE) # Resumes from the checkpoint
+    option6 = font_style.render("6. Sair", True, WHITE) # Adjusted option
+
+    screen.blit(title, title.get_rect(center=(screen.get_width() / 2, screen.get_height() / 2 - 140)))
+    screen.blit(option1, option1.get_rect(center=(screen.get_width() / 2, screen.get_height() / 2 - 80)))
+    screen.blit(option2, option2.get_rect(center=(screen.get_width() / 2, screen.get_height() / 2 - 40)))
+    screen.blit(option3, option3.get_rect(center=(screen.get_width() / 2, screen.get_height() / 2)))
+    screen.blit(option4, option4.get_rect(center=(screen.get_width() / 2, screen.get_height() / 2 + 40)))
+    screen.blit(option5, option5.get_rect(center=(screen.get_width() / 2, screen.get_height() / 2 + 80)))
+    screen.blit(option6, option6.get_rect(center=(screen.get_width() / 2, screen.get_height() / 2 + 120)))
+    pygame.display.update()
+
+
+class Renderer:
+    # Window, fonts, clock and input for one Game
+    def __init__(self, caption='Jogo da Cobrinha IA'):
+        pygame.init()
+        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        pygame.display.set_caption(caption)
+        self.clock = pygame.time.Clock()
+        self.font_style = pygame.font.SysFont("bahnschrift", 25)
+        self.score_font = pygame.font.SysFont("comicsansms", 35)
+        # Dirty-rectangle drawing: what is on screen is remembered, so a frame only repaints
+        # the cells that changed (new heads, vacated tails, food) and the texts that changed
+        self.reset_frame()
+
+    def poll_events(self):
+        # Returns the input since the last call: "quit", a direction for arrow keys,
+        # or the key name ('c', 'q', ...) for other key presses
+        events = []
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                events.append("quit")
+            elif event.type == pygame.KEYDOWN:
+                if event.key in KEY_DIRECTIONS:
+                    events.append(KEY_DIRECTIONS[event.key])
+                else:
+                    events.append(pygame.key.name(event.key))
+        return events
+
+    def draw_frame(self, game):
+        # Usually one tick has passed since the last frame: only the cells that changed and the
+        # texts whose values changed are repainted and sent to the display. Anything else
+        # (a new game, a seek, a snake that died) repaints the whole window.
+        alive = [snake.is_alive for snake in game.snakes]
+        if (game is not self.frame_game or not 0 <= game.ticks - self.frame_ticks <= 1
+                or alive != [ends[2] for ends in self.snake_ends]):
+            self._draw_full(game)
+        else:
+            self._draw_changes(game)
+        self.frame_game = game
+        self.frame_ticks = game.ticks
+
+    def reset_frame(self):
+        # Forgets what is on screen, so the next draw_frame repaints everything
+        self.frame_game = None
+        self.frame_ticks = 0
+        self.painted = {} # Cell position -> color on screen (snakes and food; black cells are left out)
+        self.snake_ends = [] # Per snake: (head, tail, is_alive) when last drawn
+        self.food_pos = None
+        self.texts = {} # Slot -> (text, surface, rect) on screen
+
+    def _draw_full(self, game):
+        self.screen.fill(BLACK)
+        self.painted = {game.food.position: BLUE}
+        for snake in game.snakes:
+            if snake.is_alive:
+                for segment in snake.body:
+                    self.painted[segment] = snake.color
+        for pos, color in self.painted.items():
+            pygame.draw.rect(self.screen, color, [pos[0], pos[1], BLOCK_SIZE, BLOCK_SIZE])
+        self.snake_ends = [(snake.body[0], snake.body[-1], snake.is_alive) for snake in game.snakes]
+        self.food_pos = game.food.position
+        self.texts = {}
+        self._draw_texts(game, None)
+        pygame.display.update()
+
+    def _draw_changes(self, game):
+        changed = {} # Cell position -> new color
+        for i, snake in enumerate(game.snakes):
+            if not snake.is_alive:
+                continue
+            head, tail, _ = self.snake_ends[i]
+            # The old tail is only vacated if nothing else moved onto it
+            if snake.body[-1] != tail and game.board.count(tail) == 0:
+                changed[tail] = BLACK
+            if snake.body[0] != head:
+                changed[snake.body[0]] = snake.color
+            self.snake_ends[i] = (snake.body[0], snake.body[-1], True)
+        food = game.food.position
+        if food != self.food_pos:
+            if self.food_pos not in changed and game.board.count(self.food_pos) == 0:
+                changed[self.food_pos] = BLACK
+            changed[food] = BLUE
+            self.food_pos = food
+
+        dirty = []
+        for pos, color in changed.items():
+            if color == BLACK:
+                self.painted.pop(pos, None)
+            else:
+                self.painted[pos] = color
+            dirty.append(pygame.draw.rect(self.screen, color, [pos[0], pos[1], BLOCK_SIZE, BLOCK_SIZE]))
+        dirty.extend(self._draw_texts(game, dirty))
+        pygame.display.update(dirty)
+
+    def _score_texts(self, game):
+        # (slot, font, text, color, right aligned, y) of every text drawn over the game
+        if game.mode == 'human' or game.mode == 'ai_watch':
+            snake = game.snakes[0]
+            texts = [('score', self.score_font, "Pontuação: " + str(snake.score), WHITE, False, 0)]
+            if game.mode == 'ai_watch':
+                texts.append(('lifespan', self.font_style, f"Vida: {snake.lifespan}", WHITE, False, 40))
+            return texts
+        return [('human_score', self.score_font, f"Humano: {game.human_snake.score}", GREEN, False, 0),
+                ('ai_score', self.score_font, f"IA: {game.ai_snake.score}", PURPLE, True, 0),
+                # Display life status
+                ('human_status', self.font_style, f"Humano Vivo: {game.human_snake.is_alive}", GREEN, False, 40),
+                ('ai_status', self.font_style, f"IA Viva: {game.ai_snake.is_alive}", PURPLE, True, 40)]
+
+    def _draw_texts(self, game, cell_rects):
+        # Text surfaces are only rendered again when their text changes. cell_rects: cells just
+        # repainted (None after a full repaint); texts they touch are drawn again on top.
+        # Returns the screen areas that changed.
+        areas = []
+        texts = []
+        for slot, font, text, color, right_aligned, y in self._score_texts(game):
+            old = self.texts.get(slot)
+            if old is not None and old[0] == text:
+                surface, rect = old[1], old[2]
+            else:
+                surface = font.render(text, True, color)
+                if right_aligned:
+                    rect = surface.get_rect(topright=(SCREEN_WIDTH, y))
+                else:
+                    rect = surface.get_rect(topleft=(0, y))
+                if old is not None:
+                    areas.append(old[2].union(rect))
+            self.texts[slot] = (text, surface, rect)
+            texts.append((surface, rect))
+        if cell_rects is None:
+            for surface, rect in texts:
+                self.screen.blit(surface, rect)
+            return areas
+
+        for surface, rect in texts:
+            if rect.collidelist(cell_rects) != -1:
+                areas.append(rect)
+        # Clear the areas down to the game underneath, then put every text touching them back
+        for area in areas:
+            self._repaint_cells(area)
+        for surface, rect in texts:
+            if rect.collidelist(areas) != -1:
+                self.screen.blit(surface, rect)
+        return areas
+
+    def _repaint_cells(self, area):
+        # Background and cells inside area only (clipped, so nothing outside it is touched)
+        area = area.clip(self.screen.get_rect())
+        self.screen.set_clip(area)
+        self.screen.fill(BLACK)
+        for x in range(area.left // BLOCK_SIZE * BLOCK_SIZE, area.right, BLOCK_SIZE):
+            for y in range(area.top // BLOCK_SIZE * BLOCK_SIZE, area.bottom, BLOCK_SIZE):
+                color = self.painted.get((x, y))
+                if color is not None:
+                    pygame.draw.rect(self.screen, color, [x, y, BLOCK_SIZE, BLOCK_SIZE])
+        self.screen.set_clip(None)
+
+    def draw_score(self, game):
+        self._draw_texts(game, None)
+
+    def clear(self):
+        self.screen.fill(BLACK)
+        self.reset_frame()
+
+    def display_message(self, msg, color, y_offset=0):
+        message_render = self.font_style.render(msg, True, color)
+        text_rect = message_render.get_rect(center=(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2 + y_offset))
+        self.screen.blit(message_render, text_rect)
+        pygame.display.update()
+
+    def tick(self, fps):
+        # fps 0 or None: no frame cap
+        self.clock.tick(fps or 0)
+
+    def close(self):
+        pygame.quit()
@@ -0,0 +1,166 @@
+# File: replay.py
+
+# Compact game replays. A headless 'ai_watch' game is fully determined by its seed and the
+# AI's moves, so a replay is just those: one byte per tick (0 straight, 1 left, 2 right).
+# Replays are appended to one file per generation:
+#   file header: magic, format version
+#   per game:    seed, generation, fitness, termination reason code, random start flag,
+#                number of ticks, then one action byte per tick
+# Usage: python replay.py FILE [--game N] [--tick T] [--headless] [--speed FPS]
+
+import argparse
+import struct
+from simulation import Simulation
+from termination import TERMINATION_REASONS, REASON_CODES
+from config import AI_DISPLAY_SPEED
+
+MAGIC = b'SNAKERP\0'
+FORMAT_VERSION = 1
+FILE_HEADER = struct.Struct('<8sH')
+RECORD_HEADER = struct.Struct('<QIdBBI')
+
+
+class Replay:
+    def __init__(self, seed, actions, generation=0, fitness=0.0, termination_reason=None, random_start=True):
+        self.seed = seed
+        self.actions = bytes(actions)
+        self.generation = generation
+        self.fitness = fitness
+        self.termination_reason = termination_reason
+        self.random_start = random_start
+
+    def __len__(self):
+        return len(self.actions)
+
+
+def record_game(nn_model, seed, termination=None, generation=0):
+    # Plays one headless game with this network and returns its Replay
+    game_sim = Simulation(mode='ai_watch', nn_model=nn_model, random_start=True, termination=termination,
+                          seed=seed, record=True)
+    game_sim.run()
+    return Replay(seed, game_sim.actions, generation, game_sim.ai_snake.get_fitness(),
+                  game_sim.termination_reason, random_start=True)
+
+def append_replay(filename, replay):
+    # Append-only: earlier games in the file are never rewritten
+    with open(filename, 'ab') as f:
+        if f.tell() == 0:
+            f.write(FILE_HEADER.pack(MAGIC, FORMAT_VERSION))
+        f.write(RECORD_HEADER.pack(replay.seed, replay.generation, replay.fitness,
+                                   REASON_CODES[replay.termination_reason], replay.random_start, len(replay.actions)))
+        f.write(replay.actions)
+
+def read_replays(filename):
+    with open(filename, 'rb') as f:
+        data = f.read()
+    if len(data) < FILE_HEADER.size:
+        raise ValueError(f"{filename} is not a replay file.")
+    magic, version = FILE_HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{filename} is not a replay file.")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"{filename} has replay format version {version}, expected {FORMAT_VERSION}.")
+
+    replays = []
+    offset = FILE_HEADER.size
+    while offset + RECORD_HEADER.size <= len(data):
+        seed, generation, fitness, reason_code, random_start, num_ticks = RECORD_HEADER.unpack_from(data, offset)
+        offset += RECORD_HEADER.size
+        if offset + num_ticks > len(data):
+            break # A game cut off while it was being appended
+        replays.append(Replay(seed, data[offset:offset + num_ticks], generation, fitness,
+                              TERMINATION_REASONS[reason_code], bool(random_start)))
+        offset += num_ticks
+    return replays
+
+
+class ReplayPlayer:
+    # Rebuilds a recorded game tick by tick; seek() jumps to any tick (backwards by replaying
+    # from the start, which takes milliseconds for a headless game)
+    def __init__(self, replay):
+        self.replay = replay
+        self.restart()
+
+    def restart(self):
+        self.simulation = Simulation(mode='ai_watch', random_start=self.replay.random_start,
+                                     seed=self.replay.seed, external_actions=True)
+        self.tick = 0
+
+    @property
+    def finished(self):
+        return self.tick >= len(self.replay.actions)
+
+    def step(self):
+        if not self.finished:
+            self.simulation.step(self.replay.actions[self.tick])
+            self.tick += 1
+
+    def seek(self, tick):
+        tick = max(0, min(tick, len(self.replay.actions)))
+        if tick < self.tick:
+            self.restart()
+        while self.tick < tick:
+            self.step()
+        return self.simulation
+
+    def play(self, speed=AI_DISPLAY_SPEED):
+        # Window playback. Space pauses, left/right step while paused, r restarts, up/down change speed, q quits.
+        import pygame
+        from renderer import Renderer
+        from config import UP, DOWN, LEFT, RIGHT
+        renderer = Renderer('Replay')
+        paused = False
+        try:
+            while True:
+                for event in renderer.poll_events():
+                    if event in ("quit", "q", "escape"):
+                        return
+                    if event == "space":
+                        paused = not paused
+                    elif event == "r":
+                        self.restart()
+                    elif event == RIGHT:
+                        self.step()
+                    elif event == LEFT:
+                        self.seek(self.tick - 1)
+                    elif event == UP:
+                        speed = min(speed * 2, 960)
+                    elif event == DOWN:
+                        speed = max(speed // 2, 1)
+                if not paused:
+                    self.step()
+                renderer.draw_frame(self.simulation)
+                pygame.display.set_caption(f"Replay - tick {self.tick}/{len(self.replay.actions)}"
+                                           f" - {speed} fps{' (paused)' if paused else ''}")
+                renderer.tick(speed)
+        finally:
+            renderer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List or play recorded games.")
+    parser.add_argument('file', help="replay file (one per generation)")
+    parser.add_argument('--game', type=int, default=None, help="index of the game in the file to play")
+    parser.add_argument('--tick', type=int, default=0, help="start at this tick")
+    parser.add_argument('--headless', action='store_true', help="print the state at --tick instead of opening a window")
+    parser.add_argument('--speed', type=int, default=AI_DISPLAY_SPEED, help="playback fps (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    replays = read_replays(args.file)
+    if args.game is None:
+        for index, replay in enumerate(replays):
+            print(f"{index}: generation {replay.generation}, fitness {replay.fitness:g}, {len(replay)} ticks, "
+                  f"ended by {replay.termination_reason}, seed {replay.seed}")
+        return
+
+    player = ReplayPlayer(replays[args.game])
+    simulation = player.seek(args.tick)
+    if args.headless:
+        snake = simulation.ai_snake
+        print(f"tick {player.tick}: head {snake.get_head_pos()}, length {len(snake.body)}, score {snake.score}, "
+              f"food {simulation.food.get_pos()}, game over {simulation.game_over}")
+    else:
+        player.play(args.speed)
+
+if __name__ == "__main__":
+    main()
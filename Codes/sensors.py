@@ -0,0 +1,68 @@
+# File: sensors.py
+
+import numpy as np
+from config import GRID_WIDTH, GRID_HEIGHT, BLOCK_SIZE, RAY_COUNT
+
+# Ray-cast vision for the 'rays' sensor pack (config.SENSOR_PACK). From the head, 8 rays
+# (ahead, ahead-right, right, ... clockwise, relative to the snake's direction) each give
+# 1/steps to the wall, to the first occupied cell and to the food (0 when the ray misses).
+# Every ray's cells are precomputed per start cell, so a tick is a few NumPy gathers on the
+# occupancy grid, for one board or a whole batch of boards at once.
+# Output layout per snake: 8 wall values, 8 body values, 8 food values.
+
+NUM_CELLS = GRID_WIDTH * GRID_HEIGHT
+# Absolute ray directions in grid steps, clockwise from up (same start as CLOCKWISE_DIRECTIONS)
+RAY_DIRECTIONS = [(0, -1), (1, -1), (1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1)]
+MAX_RAY_STEPS = max(GRID_WIDTH, GRID_HEIGHT) - 1
+# RELATIVE_RAYS[direction index] -> absolute ray of each relative ray (the 4 directions are every other ray)
+RELATIVE_RAYS = np.array([[(ray + 2 * d) % RAY_COUNT for ray in range(RAY_COUNT)] for d in range(4)])
+# 1/steps for a hit at each position along a ray
+INVERSE_STEPS = 1.0 / np.arange(1, MAX_RAY_STEPS + 1)
+
+def _ray_tables():
+    # RAY_CELLS[cell, ray, step]: cell index along the ray (0 past the wall, see RAY_VALID)
+    # RAY_VALID[cell, ray, step]: whether that step is still on the board
+    # RAY_WALL[cell, ray]: 1/steps until the ray leaves the board
+    cells = np.zeros((NUM_CELLS, RAY_COUNT, MAX_RAY_STEPS), dtype=np.intp)
+    valid = np.zeros((NUM_CELLS, RAY_COUNT, MAX_RAY_STEPS), dtype=bool)
+    wall = np.zeros((NUM_CELLS, RAY_COUNT))
+    for cell in range(NUM_CELLS):
+        for ray, (dx, dy) in enumerate(RAY_DIRECTIONS):
+            x, y = cell % GRID_WIDTH, cell // GRID_WIDTH
+            steps = 0
+            while True:
+                x, y = x + dx, y + dy
+                if not (0 <= x < GRID_WIDTH and 0 <= y < GRID_HEIGHT):
+                    break
+                cells[cell, ray, steps] = y * GRID_WIDTH + x
+                valid[cell, ray, steps] = True
+                steps += 1
+            wall[cell, ray] = 1.0 / (steps + 1)
+    return cells, valid, wall
+
+RAY_CELLS, RAY_VALID, RAY_WALL = _ray_tables()
+
+def _inverse_distance(hits):
+    # 1/steps to the first hit along each ray, 0 where the ray hits nothing
+    first = np.argmax(hits, axis=-1)
+    hit = np.take_along_axis(hits, first[..., np.newaxis], axis=-1)[..., 0]
+    return np.where(hit, INVERSE_STEPS[first], 0.0)
+
+def ray_sensors(occupancy, head_cells, directions, food_cells):
+    # Batched: occupancy is (n, NUM_CELLS) (bool or segment counts), the rest one value per board
+    # (cell indices and direction indices). Returns (n, 3 * RAY_COUNT) sensor values.
+    rays = RELATIVE_RAYS[directions] # (n, RAY_COUNT)
+    heads = head_cells[:, np.newaxis]
+    cells = RAY_CELLS[heads, rays] # (n, RAY_COUNT, MAX_RAY_STEPS)
+    valid = RAY_VALID[heads, rays]
+    rows = np.arange(len(head_cells))[:, np.newaxis, np.newaxis]
+    body = (occupancy[rows, cells] > 0) & valid
+    food = (cells == food_cells[:, np.newaxis, np.newaxis]) & valid
+    return np.concatenate([RAY_WALL[heads, rays], _inverse_distance(body), _inverse_distance(food)], axis=1)
+
+def snake_ray_sensors(board, head_pos, direction_index, food_pos):
+    # One snake on a Board (pixel positions), read straight from the board's occupancy grid
+    head_cell = (head_pos[1] // BLOCK_SIZE) * GRID_WIDTH + head_pos[0] // BLOCK_SIZE
+    food_cell = (food_pos[1] // BLOCK_SIZE) * GRID_WIDTH + food_pos[0] // BLOCK_SIZE
+    return ray_sensors(board.grid[np.newaxis], np.array([head_cell]), np.array([direction_index]),
+                       np.array([food_cell]))[0]
@@ -0,0 +1,253 @@
+# File: simulation.py
+
+import time
+import numpy as np
+from profiler import PROFILER
+# Import classes and settings from other files (none of them need pygame)
+from snake import Snake
+from board import Board
+from food import Food
+from compiled_policy import CompiledPolicy
+from termination import (LoopDetector, state_key, COLLISION, STARVATION, LOOP, BOARD_FULL)
+from config import (BLOCK_SIZE, SCREEN_WIDTH, SCREEN_HEIGHT, GREEN, PURPLE,
+                    UP, DOWN, LEFT, RIGHT)
+
+class Simulation:
+    # The game rules without any display: snakes, food, collisions and AI decisions.
+    # Game adds the pygame window and keyboard on top of this; training uses it directly.
+    def __init__(self, mode='ai_watch', nn_model=None, random_start=False, termination=None,
+                 rng=None, seed=None, record=False, external_actions=False):
+        self.mode = mode
+        self.nn_model = nn_model # NN model for AI
+        # A CompiledPolicy (compiled_policy.py) decides from a packed state key, without a forward pass
+        self.compiled_policy = nn_model if isinstance(nn_model, CompiledPolicy) else None
+        # external_actions: the AI snake's moves are passed to step() instead of coming from
+        # nn_model (replays). record keeps every AI move in self.actions (replay.py).
+        self.external_actions = external_actions
+        self.seed = seed
+        self.actions = bytearray() if record else None
+        # Optional TerminationPolicy (termination.py) for headless runs; None keeps the
+        # plain max_moves_without_food limit below
+        self.termination = termination
+
+        # All randomness of this game (start position, food) comes from its own generator,
+        # so the same seed replays the same game for the same decisions
+        self.rng = rng if rng is not None else np.random.default_rng(seed)
+
+        # Occupancy grid shared by all snakes, so collisions and danger checks are O(1)
+        self.board = Board(self.rng)
+
+        # Configure snakes based on mode
+        if self.mode == 'human':
+            self.human_snake = Snake((SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2), RIGHT, GREEN, self.board)
+            self.snakes = [self.human_snake]
+        elif self.mode == 'ai_watch':
+            if not self.nn_model and not external_actions:
+                raise ValueError("Neural network model is required for 'ai_watch' mode.")
+            # For GA training, AI snakes should start in random-ish spots to avoid bias
+            if random_start:
+                start_x = int(self.rng.integers(SCREEN_WIDTH // BLOCK_SIZE)) * BLOCK_SIZE
+                start_y = int(self.rng.integers(SCREEN_HEIGHT // BLOCK_SIZE)) * BLOCK_SIZE
+                start_dir = [UP, DOWN, LEFT, RIGHT][int(self.rng.integers(4))]
+                self.ai_snake = Snake((start_x, start_y), start_dir, GREEN, self.board)
+            else:
+                self.ai_snake = Snake((SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2), RIGHT, GREEN, self.board)
+            self.snakes = [self.ai_snake]
+        elif self.mode == 'human_vs_ai':
+            if not self.nn_model:
+                raise ValueError("Neural network model is required for 'human_vs_ai' mode.")
+            # Start cells are snapped to the grid, like food, so both snakes can reach the food
+            self.human_snake = Snake((SCREEN_WIDTH // 4 // BLOCK_SIZE * BLOCK_SIZE, SCREEN_HEIGHT // 2), RIGHT, GREEN, self.board)
+            self.ai_snake = Snake((SCREEN_WIDTH * 3 // 4 // BLOCK_SIZE * BLOCK_SIZE, SCREEN_HEIGHT // 2), LEFT, PURPLE, self.board) # AI starts on the other side
+            self.snakes = [self.human_snake, self.ai_snake]
+        else:
+            raise ValueError("Invalid game mode.")
+
+        self.food = Food()
+        self.game_over = False
+        self.winner = None # For VS mode
+        self.termination_reason = None # Why the game ended (see termination.py)
+        self.ticks = 0
+        self.profiler = PROFILER if PROFILER.enabled else None # Per-phase timing (profiler.py)
+        # Looping only makes sense to detect when every snake is AI controlled
+        if termination is not None and termination.detect_loops and self.mode == 'ai_watch':
+            self.loop_detector = LoopDetector()
+        else:
+            self.loop_detector = None
+        self._spawn_food() # Spawn the first food
+
+        # Max moves without eating food to prevent infinite loops for AI
+        # This is crucial for training, otherwise snakes can get stuck and run forever
+        self.max_moves_without_food = 200 * (SCREEN_WIDTH * SCREEN_HEIGHT / (BLOCK_SIZE * BLOCK_SIZE)) / len(self.snakes)
+        self.moves_since_last_food = 0
+
+    def _spawn_food(self):
+        # The shared board already knows every free cell
+        if not self.food.spawn(self.board):
+            # Board completely filled by snakes: nothing left to eat
+            self.game_over = True
+            self.termination_reason = BOARD_FULL
+        self.moves_since_last_food = 0 # Reset counter when food is spawned
+        if self.loop_detector is not None:
+            self.loop_detector.reset() # New food, so earlier states cannot repeat
+
+    def _get_ai_decision(self, ai_snake, other_snake_body=None):
+        profiler = self.profiler
+        if profiler:
+            start = time.perf_counter()
+        if self.compiled_policy is not None:
+            decision_index = self.compiled_policy.decide(ai_snake.get_state_key(self.food.get_pos(), other_snake_body))
+            if profiler:
+                profiler.lap('game', 'infer', start)
+            ai_snake.turn(decision_index)
+            return decision_index
+        inputs = ai_snake.get_state_for_nn(self.food.get_pos(), other_snake_body)
+        if profiler:
+            start = profiler.lap('game', 'sense', start)
+        outputs = self.nn_model.forward(inputs)
+        decision_index = np.argmax(outputs[0])
+        if profiler:
+            profiler.lap('game', 'infer', start)
+
+        # Straight / turn left / turn right relative to the current direction (lookup table)
+        ai_snake.turn(decision_index)
+        return decision_index
+
+    def step(self, action=None):
+        # Advances the game by one tick (does nothing once the game is over).
+        # action: the AI snake's relative move (0 straight, 1 left, 2 right) for 'ai_watch'
+        # games with external_actions; otherwise nn_model decides.
+        if self.game_over:
+            return
+
+        # Update moves since last food
+        self.ticks += 1
+        self.moves_since_last_food += 1
+        reason = self._check_termination()
+        if reason is not None:
+            # Force game over if snake gets stuck or cannot find food
+            for snake in self.snakes:
+                snake.is_alive = False
+            self.game_over = True
+            self.termination_reason = reason
+            self.winner = "Tempo Esgotado" # Or similar, if needed for VS mode
+
+        # Movement and AI (the AI decision times itself as 'sense' and 'infer')
+        profiler = self.profiler
+        if profiler:
+            profiler.count('ticks')
+            start = time.perf_counter()
+        if self.mode == 'human':
+            self.human_snake.move()
+        elif self.mode == 'ai_watch':
+            if action is None:
+                action = self._get_ai_decision(self.ai_snake)
+            else:
+                self.ai_snake.turn(action)
+            # A game stopped by the termination policy makes no move this tick, so nothing to record
+            if self.actions is not None and self.ai_snake.is_alive:
+                self.actions.append(action)
+            if profiler:
+                start = time.perf_counter()
+            self.ai_snake.move()
+        elif self.mode == 'human_vs_ai':
+            if self.human_snake.is_alive:
+                self.human_snake.move()
+            if self.ai_snake.is_alive:
+                if profiler:
+                    start = profiler.lap('game', 'move', start)
+                self._get_ai_decision(self.ai_snake) # AI sees the other snake through the shared board
+                if profiler:
+                    start = time.perf_counter()
+                self.ai_snake.move()
+        if profiler:
+            start = profiler.lap('game', 'move', start)
+
+        # Collisions
+        if self.mode == 'human':
+            if self.human_snake.check_collision():
+                self.game_over = True
+        elif self.mode == 'ai_watch':
+            if self.ai_snake.check_collision():
+                self.game_over = True
+        elif self.mode == 'human_vs_ai':
+            # Check collisions for human snake
+            if self.human_snake.is_alive:
+                if self.human_snake.check_collision(): # Human vs wall/self/AI (shared board)
+                    self.game_over = True
+                    if not self.human_snake.is_alive and self.ai_snake.is_alive:
+                        self.winner = "IA"
+            # Check collisions for AI snake
+            if self.ai_snake.is_alive:
+                if self.ai_snake.check_collision(): # AI vs wall/self/Human (shared board)
+                    self.game_over = True
+                    if not self.ai_snake.is_alive and self.human_snake.is_alive:
+                        self.winner = "Humano"
+
+            # Check if both are dead (draw)
+            if not self.human_snake.is_alive and not self.ai_snake.is_alive:
+                self.game_over = True
+                self.winner = "Ninguém (Empate)"
+            # If one is dead and the other is alive, the game is over and winner is set above
+            elif (self.human_snake.is_alive and not self.ai_snake.is_alive):
+                self.game_over = True
+                self.winner = "Humano"
+            elif (not self.human_snake.is_alive and self.ai_snake.is_alive):
+                self.game_over = True
+                self.winner = "IA"
+
+        if profiler:
+            start = profiler.lap('game', 'collide', start)
+
+        # Food
+        food_eaten = False
+        if self.mode == 'human' and self.food.get_pos() == self.human_snake.get_head_pos() and self.human_snake.is_alive:
+            self.human_snake.ate_food()
+            food_eaten = True
+        elif self.mode == 'ai_watch' and self.food.get_pos() == self.ai_snake.get_head_pos() and self.ai_snake.is_alive:
+            self.ai_snake.ate_food()
+            food_eaten = True
+        elif self.mode == 'human_vs_ai':
+            if self.food.get_pos() == self.human_snake.get_head_pos() and self.human_snake.is_alive:
+                self.human_snake.ate_food()
+                food_eaten = True
+            elif self.food.get_pos() == self.ai_snake.get_head_pos() and self.ai_snake.is_alive:
+                self.ai_snake.ate_food()
+                food_eaten = True
+
+        if food_eaten:
+            self._spawn_food()
+        if profiler:
+            profiler.lap('game', 'spawn', start)
+
+        # Check if all snakes are dead in multi-snake modes
+        if self.mode == 'human_vs_ai':
+            if not self.human_snake.is_alive and not self.ai_snake.is_alive:
+                self.game_over = True
+        elif self.mode == 'human' and not self.human_snake.is_alive:
+             self.game_over = True
+        elif self.mode == 'ai_watch' and not self.ai_snake.is_alive:
+             self.game_over = True
+
+        if self.game_over and self.termination_reason is None:
+            self.termination_reason = COLLISION
+
+    def _check_termination(self):
+        if self.termination is None:
+            if self.moves_since_last_food > self.max_moves_without_food:
+                return STARVATION
+            return None
+
+        length = max(len(snake.body) for snake in self.snakes)
+        reason = self.termination.check(self.ticks, self.moves_since_last_food, length)
+        if reason is None and self.loop_detector is not None:
+            snake = self.ai_snake
+            head_cell = self.board.cell_index(snake.body[0])
+            if self.loop_detector.update(state_key(self.board.hash, head_cell, snake.direction_index)):
+                reason = LOOP
+        return reason
+
+    def run(self):
+        # Plays until game over, as fast as possible
+        while not self.game_over:
+            self.step()
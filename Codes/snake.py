@@ -1,33 +1,55 @@
-import pygame
 from collections import deque
 import numpy as np
-from config import BLOCK_SIZE, SCREEN_WIDTH, SCREEN_HEIGHT, GREEN, UP, DOWN, LEFT, RIGHT, INPUT_NEURONS
+from board import Board
+from sensors import snake_ray_sensors
+from config import (BLOCK_SIZE, SCREEN_WIDTH, SCREEN_HEIGHT, INPUT_NEURONS, CLOCKWISE_DIRECTIONS,
+                    DIRECTION_INDEX, TURN_TABLE, RELATIVE_OFFSETS, DIRECTION_ONE_HOT, SENSOR_PACK, BASIC_INPUTS,
+                    NN_DTYPE)
 
 class Snake:
-    def __init__(self, start_pos, start_direction, color):
+    def __init__(self, start_pos, start_direction, color, board=None):
         self.body = deque([start_pos])
-        self.direction = start_direction
+        # Occupancy grid; pass the same Board to every snake of a game so they see each other
+        self.board = board if board is not None else Board()
+        self.board.add(start_pos)
+        self.direction_index = DIRECTION_INDEX[start_direction]
         self.color = color 
         self.grow = False
         self.score = 0
         self.lifespan = 0 
         self.is_alive = True
+        # Network inputs are written here on every tick instead of allocating a new array
+        self.nn_inputs = np.zeros((1, INPUT_NEURONS), dtype=NN_DTYPE)
+
+    @property
+    def direction(self):
+        return CLOCKWISE_DIRECTIONS[self.direction_index]
+
+    @direction.setter
+    def direction(self, new_direction):
+        self.direction_index = DIRECTION_INDEX[new_direction]
 
     def change_direction(self, new_direction):
         if self.is_alive and (new_direction[0] * -1, new_direction[1] * -1) != self.direction:
             self.direction = new_direction
 
+    def turn(self, action):
+        # Relative turn chosen by the AI: 0 straight, 1 left, 2 right (never a reversal)
+        if self.is_alive:
+            self.direction_index = TURN_TABLE[self.direction_index][action]
+
     def move(self):
         if not self.is_alive:
             return
 
         head_x, head_y = self.body[0]
-        dir_x, dir_y = self.direction
+        dir_x, dir_y = CLOCKWISE_DIRECTIONS[self.direction_index]
         new_head = (head_x + dir_x * BLOCK_SIZE, head_y + dir_y * BLOCK_SIZE)
         self.body.appendleft(new_head)
+        self.board.add(new_head)
 
         if not self.grow:
-            self.body.pop() 
+            self.board.remove(self.body.pop())
         else:
             self.grow = False
 
@@ -45,19 +67,19 @@ class Snake:
         if head[0] >= SCREEN_WIDTH or head[0] < 0 or head[1] >= SCREEN_HEIGHT or head[1] < 0:
             self.is_alive = False
             return True
-        if len(self.body) > 1 and head in list(self.body)[1:]:
+        # More than one segment on the head's cell: it ran into itself or a snake sharing the board
+        if self.board.count(head) > 1:
              self.is_alive = False
              return True
+        # Only needed for snakes that are not on this snake's board
         if other_snake_body and head in other_snake_body:
             self.is_alive = False
             return True
         return False
 
     def draw(self, screen):
-        if not self.is_alive:
-            return
-        for segment in self.body:
-            pygame.draw.rect(screen, self.color, [segment[0], segment[1], BLOCK_SIZE, BLOCK_SIZE])
+        from renderer import draw_snake # Only load pygame when something is drawn
+        draw_snake(screen, self)
 
     def get_head_pos(self):
         return self.body[0]
@@ -67,61 +89,49 @@ class Snake:
 
     # --- Methods for AI ---
     def get_state_for_nn(self, food_pos, other_snake_body=None):
-        head_x, head_y = self.get_head_pos()
+        # Returns the snake's reusable (1, INPUT_NEURONS) input buffer, overwritten on the next call
+        head_x, head_y = self.body[0]
+        food_x, food_y = food_pos
+        (ahead_x, ahead_y), (left_x, left_y), (right_x, right_y) = RELATIVE_OFFSETS[self.direction_index]
+        dir_left, dir_right, dir_up, dir_down = DIRECTION_ONE_HOT[self.direction_index]
+
+        inputs = self.nn_inputs[0]
+        inputs[0] = self._is_danger(head_x + ahead_x, head_y + ahead_y, other_snake_body) # danger_ahead
+        inputs[1] = self._is_danger(head_x + left_x, head_y + left_y, other_snake_body) # danger_left
+        inputs[2] = self._is_danger(head_x + right_x, head_y + right_y, other_snake_body) # danger_right
+        inputs[3] = food_y < head_y # food_up
+        inputs[4] = food_y > head_y # food_down
+        inputs[5] = food_x < head_x # food_left
+        inputs[6] = food_x > head_x # food_right
+        inputs[7] = dir_left
+        inputs[8] = dir_right
+        inputs[9] = dir_up
+        inputs[10] = dir_down
+        if SENSOR_PACK == 'rays':
+            # Ray sensors see the shared board, not snakes outside it (other_snake_body)
+            inputs[BASIC_INPUTS:] = snake_ray_sensors(self.board, self.body[0], self.direction_index, food_pos)
+        return self.nn_inputs
+
+    def get_state_key(self, food_pos, other_snake_body=None):
+        # The 'basic' sensor pack packed into one int (see compiled_policy.py), for compiled policies
+        head_x, head_y = self.body[0]
         food_x, food_y = food_pos
-        current_direction = self.direction
-        
-        if current_direction == RIGHT:
-            ahead = RIGHT
-            left = UP
-            right = DOWN
-        elif current_direction == LEFT:
-            ahead = LEFT
-            left = DOWN
-            right = UP
-        elif current_direction == UP:
-            ahead = UP
-            left = LEFT
-            right = RIGHT
-        else: 
-            ahead = DOWN
-            left = RIGHT
-            right = LEFT
-
-        danger_ahead = self._is_danger(head_x + ahead[0] * BLOCK_SIZE, head_y + ahead[1] * BLOCK_SIZE, other_snake_body)
-        danger_left = self._is_danger(head_x + left[0] * BLOCK_SIZE, head_y + left[1] * BLOCK_SIZE, other_snake_body)
-        danger_right = self._is_danger(head_x + right[0] * BLOCK_SIZE, head_y + right[1] * BLOCK_SIZE, other_snake_body)
-
-        food_up = int(food_y < head_y)
-        food_down = int(food_y > head_y)
-        food_left = int(food_x < head_x)
-        food_right = int(food_x > head_x)
-
-        dir_left = int(current_direction == LEFT)
-        dir_right = int(current_direction == RIGHT)
-        dir_up = int(current_direction == UP)
-        dir_down = int(current_direction == DOWN)
-
-        inputs = np.array([
-            danger_ahead,
-            danger_left,
-            danger_right,
-            food_up,
-            food_down,
-            food_left,
-            food_right,
-            dir_left,
-            dir_right,
-            dir_up,
-            dir_down
-        ]).reshape(1, INPUT_NEURONS)
-        return inputs
+        (ahead_x, ahead_y), (left_x, left_y), (right_x, right_y) = RELATIVE_OFFSETS[self.direction_index]
+        return (self._is_danger(head_x + ahead_x, head_y + ahead_y, other_snake_body)
+                | self._is_danger(head_x + left_x, head_y + left_y, other_snake_body) << 1
+                | self._is_danger(head_x + right_x, head_y + right_y, other_snake_body) << 2
+                | (food_y < head_y) << 3
+                | (food_y > head_y) << 4
+                | (food_x < head_x) << 5
+                | (food_x > head_x) << 6
+                | self.direction_index << 7)
 
     def _is_danger(self, x, y, other_snake_body=None):
         if x >= SCREEN_WIDTH or x < 0 or y >= SCREEN_HEIGHT or y < 0:
             return 1 
-        if (x, y) in list(self.body):
-            return 1if other_snake_body and (x, y) in other_snake_body:
+        if self.board.count_at(x, y):
+            return 1
+        if other_snake_body and (x, y) in other_snake_body:
             return 1 
         return 0 
 
@@ -0,0 +1,81 @@
+# File: termination.py
+
+import numpy as np
+# Import settings from config.py
+from config import (GRID_WIDTH, GRID_HEIGHT, STARVATION_BASE, STARVATION_PER_SEGMENT,
+                    MAX_TICKS, DETECT_LOOPS)
+
+# Why a game ended. The list index is the code VectorSnakeEnv stores per game.
+COLLISION = 'collision'
+STARVATION = 'starvation'
+LOOP = 'loop'
+TICK_CAP = 'tick_cap'
+BOARD_FULL = 'board_full'
+TERMINATION_REASONS = [None, COLLISION, STARVATION, LOOP, TICK_CAP, BOARD_FULL]
+REASON_CODES = {reason: code for code, reason in enumerate(TERMINATION_REASONS)}
+
+# Zobrist keys: XOR-ing the key of every occupied cell gives a body hash that can be
+# updated in O(1) as the head and tail move. Head cell and direction get keys of their own.
+_key_rng = np.random.default_rng(0x5EED)
+CELL_KEYS = _key_rng.integers(1, 2**63, size=GRID_WIDTH * GRID_HEIGHT, dtype=np.int64)
+HEAD_KEYS = _key_rng.integers(1, 2**63, size=GRID_WIDTH * GRID_HEIGHT, dtype=np.int64)
+DIRECTION_KEYS = _key_rng.integers(1, 2**63, size=4, dtype=np.int64)
+# Plain int versions for the pure-Python simulation
+CELL_KEY_LIST = CELL_KEYS.tolist()
+HEAD_KEY_LIST = HEAD_KEYS.tolist()
+DIRECTION_KEY_LIST = DIRECTION_KEYS.tolist()
+
+
+class TerminationPolicy:
+    # When a headless game should stop early, so a single stuck snake cannot hold up
+    # a whole generation:
+    # - starvation: more than starvation_base + starvation_per_segment * length ticks without food
+    # - loop: the same (head, direction, body hash) state came back without eating (it will repeat forever)
+    # - tick cap: max_ticks ticks in total
+    def __init__(self, starvation_base=STARVATION_BASE, starvation_per_segment=STARVATION_PER_SEGMENT,
+                 max_ticks=MAX_TICKS, detect_loops=DETECT_LOOPS):
+        self.starvation_base = starvation_base
+        self.starvation_per_segment = starvation_per_segment
+        self.max_ticks = max_ticks
+        self.detect_loops = detect_loops
+
+    def starvation_budget(self, length):
+        # Longer snakes need more moves to reach food around their own body
+        return self.starvation_base + self.starvation_per_segment * length
+
+    def check(self, ticks, moves_since_last_food, length):
+        # Reason to stop now (or None) for the non-loop rules
+        if ticks > self.max_ticks:
+            return TICK_CAP
+        if moves_since_last_food > self.starvation_budget(length):
+            return STARVATION
+        return None
+
+
+class LoopDetector:
+    # Brent's cycle detection: remembers one state and moves that checkpoint forward at
+    # doubling intervals. With a deterministic policy and no food eaten, a state that comes
+    # back means the snake is looping, and it is caught within about two loop lengths.
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        # Call whenever the food changes (the state no longer repeats)
+        self.saved_key = None
+        self.power = 1
+        self.steps = 0
+
+    def update(self, key):
+        # Returns True if this state key was seen before
+        if key == self.saved_key:
+            return True
+        self.steps += 1
+        if self.steps == self.power:
+            self.saved_key = key
+            self.power *= 2
+            self.steps = 0
+        return False
+
+
+def state_key(body_hash, head_cell, direction_index):
+    return body_hash ^ HEAD_KEY_LIST[head_cell] ^ DIRECTION_KEY_LIST[direction_index]
@@ -0,0 +1,111 @@
+# File: train.py
+
+# Headless training from the command line (no display needed), e.g.
+#   python train.py --generations 500 --population 200 --workers 8 --seed 1 --log train.jsonl
+# Every generation is reported as one JSON line (fitness, throughput and time per phase).
+
+import argparse
+import json
+import os
+import sys
+from genetic_algorithm import GeneticAlgorithmManager
+from island_model import IslandModel
+from profiler import PROFILER
+from config import (POPULATION_SIZE, SIMULATOR, EVALUATION_BACKEND, EVALUATION_SCENARIOS, FIXED_SCENARIOS,
+                    FITNESS_CACHE_SIZE, SCHEDULER, BEST_NN_FILE, CHECKPOINT_FILE, CHECKPOINT_EVERY,
+                    MIGRATION_TOPOLOGY, MIGRATION_INTERVAL, MIGRATION_SIZE, REPLAY_DIR)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train the snake AI with the genetic algorithm, without a display.")
+    parser.add_argument('--generations', type=int, default=100, help="generations to run (default: %(default)s)")
+    parser.add_argument('--population', type=int, default=POPULATION_SIZE, help="population size (default: %(default)s)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="evaluation worker processes (uses the process backend; default: serial evaluation)")
+    parser.add_argument('--simulator', choices=['vector', 'game'], default=SIMULATOR, help="default: %(default)s")
+    parser.add_argument('--scenarios', type=int, default=EVALUATION_SCENARIOS,
+                        help="seeded games every individual plays per generation, 0 for one random game (default: %(default)s)")
+    parser.add_argument('--fixed-scenarios', action='store_true', default=FIXED_SCENARIOS,
+                        help="play the same --scenarios seeds every generation (lets the fitness cache hit across generations)")
+    parser.add_argument('--cache-size', type=int, default=FITNESS_CACHE_SIZE,
+                        help="fitness cache entries, 0 disables the cache (default: %(default)s)")
+    parser.add_argument('--scheduler', choices=['generational', 'steady_state'], default=SCHEDULER,
+                        help="default: %(default)s")
+    parser.add_argument('--seed', type=int, default=None, help="random seed (default: random)")
+    parser.add_argument('--output', default=BEST_NN_FILE, help="best network file (default: %(default)s)")
+    parser.add_argument('--checkpoint', default=CHECKPOINT_FILE, help="checkpoint file (default: %(default)s)")
+    parser.add_argument('--checkpoint-every', type=int, default=CHECKPOINT_EVERY,
+                        help="generations between checkpoints, 0 disables them (default: %(default)s)")
+    parser.add_argument('--resume', action='store_true', help="continue from --checkpoint if it exists")
+    parser.add_argument('--replays', default=REPLAY_DIR,
+                        help="directory for replays of each generation's best network (see replay.py)")
+    parser.add_argument('--log', default=None, help="write the JSON lines to this file instead of stdout")
+    parser.add_argument('--islands', type=int, default=None,
+                        help="run this many island populations in parallel processes (--population is per island; "
+                             "no checkpoints)")
+    parser.add_argument('--topology', choices=['ring', 'random'], default=MIGRATION_TOPOLOGY,
+                        help="island migration topology (default: %(default)s)")
+    parser.add_argument('--migration-interval', type=int, default=MIGRATION_INTERVAL,
+                        help="generations between migrations (default: %(default)s)")
+    parser.add_argument('--migration-size', type=int, default=MIGRATION_SIZE,
+                        help="genomes sent per migration (default: %(default)s)")
+    parser.add_argument('--verbose', action='store_true', help="also print the usual progress messages")
+    parser.add_argument('--profile', action='store_true',
+                        help="time every GA and game phase; prints a summary at the end (also SNAKE_PROFILE=1)")
+    parser.add_argument('--trace', default=None, help="with --profile, also write a Chrome trace to this file")
+    args = parser.parse_args(argv)
+    if args.islands and (args.resume or args.workers):
+        parser.error("--islands cannot be combined with --resume or --workers")
+    return args
+
+def make_manager(args):
+    backend = 'process' if args.workers else EVALUATION_BACKEND
+    settings = dict(evaluation_backend=backend, num_workers=args.workers, best_nn_file=args.output,
+                    checkpoint_file=args.checkpoint, checkpoint_every=args.checkpoint_every,
+                    verbose=args.verbose, replay_dir=args.replays)
+    if args.resume and os.path.exists(args.checkpoint):
+        return GeneticAlgorithmManager.resume(args.checkpoint, **settings)
+    return GeneticAlgorithmManager(population_size=args.population, simulator=args.simulator,
+                                   seed=args.seed, evaluation_scenarios=args.scenarios,
+                                   fixed_scenarios=args.fixed_scenarios, fitness_cache_size=args.cache_size,
+                                   scheduler=args.scheduler, **settings)
+
+def run_islands(args, log):
+    island_model = IslandModel(args.islands, args.topology, args.migration_interval, args.migration_size,
+                               seed=args.seed, best_nn_file=args.output, population_size=args.population,
+                               simulator=args.simulator, evaluation_scenarios=args.scenarios,
+                               fixed_scenarios=args.fixed_scenarios, fitness_cache_size=args.cache_size,
+                               scheduler=args.scheduler)
+
+    def on_generation(island_id, stats):
+        log.write(json.dumps(dict(stats, island=island_id)) + "\n")
+        log.flush()
+    island_model.run(args.generations, on_generation)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.profile or args.trace:
+        PROFILER.enable()
+    log = open(args.log, 'a') if args.log else sys.stdout
+    try:
+        if args.islands:
+            run_islands(args, log)
+        else:
+            with make_manager(args) as ga_manager:
+                for _ in range(args.generations):
+                    stats = ga_manager.run_generation()
+                    log.write(json.dumps(stats) + "\n")
+                    log.flush()
+                if args.checkpoint_every:
+                    ga_manager.save_checkpoint()
+    finally:
+        if log is not sys.stdout:
+            log.close()
+
+    if PROFILER.enabled:
+        # On stderr, so the JSON lines on stdout stay machine readable
+        print(PROFILER.summary(), file=sys.stderr)
+        if args.trace:
+            PROFILER.write_chrome_trace(args.trace)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+# File: vector_env.py
+
+import numpy as np
+from termination import (CELL_KEYS, HEAD_KEYS, DIRECTION_KEYS, REASON_CODES,
+                         TERMINATION_REASONS, COLLISION, STARVATION, LOOP, TICK_CAP, BOARD_FULL)
+from sensors import ray_sensors
+# Import settings from config.py
+from config import (GRID_WIDTH, GRID_HEIGHT, INPUT_NEURONS, CLOCKWISE_DIRECTIONS,
+                    TURN_TABLE as TURN_LIST, DIRECTION_ONE_HOT, SENSOR_PACK, BASIC_INPUTS, NN_DTYPE)
+
+# Array versions of the direction lookup tables in config.py (same indices as Snake.direction_index)
+DIRECTIONS = CLOCKWISE_DIRECTIONS
+DIR_X = np.array([d[0] for d in DIRECTIONS], dtype=np.int32)
+DIR_Y = np.array([d[1] for d in DIRECTIONS], dtype=np.int32)
+# TURN_TABLE[direction, action] -> new direction (action 0: straight, 1: left, 2: right)
+TURN_TABLE = np.array(TURN_LIST, dtype=np.int8)
+ONE_HOT_TABLE = np.array(DIRECTION_ONE_HOT, dtype=NN_DTYPE)
+
+# Counter-based randomness for seeded games: every draw is a hash of (game seed, draw number),
+# so each game has its own stream no matter which other games share the batch
+GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+CELL_STREAMS = np.arange(1, GRID_WIDTH * GRID_HEIGHT + 1, dtype=np.uint64) * np.uint64(0xD1B54A32D192ED03)
+
+def mix64(x):
+    # SplitMix64 finalizer on a uint64 array: a well-spread 64-bit hash of each value
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+class VectorSnakeEnv:
+    # Runs many single-snake games ('ai_watch' rules) in lockstep.
+    # Every per-snake value is an array over the batch; dead games are masked out.
+    # Positions are in grid cells here, not pixels like in Snake/Food.
+    # With a TerminationPolicy, games also stop on the policy's starvation budget, tick cap
+    # and loop detection; the reason each game ended is kept in termination_codes.
+    # With seeds (one per game), start and food come from that seed alone: games with the same
+    # seed and the same moves are identical, which is how every individual gets the same scenario.
+    def __init__(self, num_envs, rng=None, max_moves_without_food=None, termination=None, seeds=None):
+        self.num_envs = num_envs
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.seeds = None if seeds is None else np.asarray(seeds).astype(np.uint64)
+        self.num_cells = GRID_WIDTH * GRID_HEIGHT
+        if max_moves_without_food is None:
+            # Same limit a single-snake Game without a termination policy uses
+            max_moves_without_food = 200 * self.num_cells
+        self.max_moves_without_food = max_moves_without_food
+        self.termination = termination
+
+        # Body is a ring buffer of cell indices per game; one extra slot so head and tail never collide
+        self.capacity = self.num_cells + 1
+        self.states = np.zeros((num_envs, INPUT_NEURONS), dtype=NN_DTYPE)
+        self.reset()
+
+    def reset(self):
+        n = self.num_envs
+        self.occupancy = np.zeros((n, self.num_cells), dtype=bool)
+        self.body = np.zeros((n, self.capacity), dtype=np.int32)
+        self.head_ptr = np.zeros(n, dtype=np.int32)
+        self.length = np.ones(n, dtype=np.int32)
+        self.grow = np.zeros(n, dtype=bool)
+        self.alive = np.ones(n, dtype=bool)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.lifespan = np.zeros(n, dtype=np.int64)
+        self.moves_since_last_food = np.zeros(n, dtype=np.int64)
+        self.ticks = 0
+        self.termination_codes = np.zeros(n, dtype=np.int8) # Index into TERMINATION_REASONS
+        # Zobrist body hash and Brent loop-detection state per game (see termination.LoopDetector)
+        self.body_hash = np.zeros(n, dtype=np.int64)
+        self.saved_key = np.zeros(n, dtype=np.int64)
+        self.power = np.ones(n, dtype=np.int64)
+        self.steps = np.zeros(n, dtype=np.int64)
+
+        # Random start cell and direction, like a headless 'ai_watch' Game
+        if self.seeds is None:
+            self.head_x = self.rng.integers(0, GRID_WIDTH, size=n).astype(np.int32)
+            self.head_y = self.rng.integers(0, GRID_HEIGHT, size=n).astype(np.int32)
+            self.direction = self.rng.integers(0, 4, size=n).astype(np.int8)
+        else:
+            self.food_draws = np.zeros(n, dtype=np.uint64)
+            start = mix64(self.seeds)
+            self.head_x = (start % np.uint64(GRID_WIDTH)).astype(np.int32)
+            self.head_y = (start // np.uint64(GRID_WIDTH) % np.uint64(GRID_HEIGHT)).astype(np.int32)
+            self.direction = (start >> np.uint64(32) & np.uint64(3)).astype(np.int8)
+        start_cells = self.head_y * GRID_WIDTH + self.head_x
+        self.body[:, 0] = start_cells
+        self.occupancy[np.arange(n), start_cells] = True
+        self.body_hash[:] = CELL_KEYS[start_cells]
+
+        self.food_x = np.zeros(n, dtype=np.int32)
+        self.food_y = np.zeros(n, dtype=np.int32)
+        self._spawn_food(np.arange(n))
+
+    def _spawn_food(self, env_ids):
+        if env_ids.size == 0:
+            return
+        # Pick a uniformly random free cell per game: random keys, occupied cells masked out
+        occupied = self.occupancy[env_ids]
+        if self.seeds is None:
+            keys = self.rng.random((env_ids.size, self.num_cells))
+            keys[occupied] = -1.0
+        else:
+            self.food_draws[env_ids] += np.uint64(1)
+            draw = mix64(self.seeds[env_ids] + self.food_draws[env_ids] * GOLDEN_GAMMA)
+            keys = mix64(draw[:, np.newaxis] ^ CELL_STREAMS)
+            keys[occupied] = 0
+        cells = np.argmax(keys, axis=1)
+        self.food_x[env_ids] = cells % GRID_WIDTH
+        self.food_y[env_ids] = cells // GRID_WIDTH
+        self.moves_since_last_food[env_ids] = 0
+        # New food, so earlier states cannot repeat: restart loop detection
+        self.saved_key[env_ids] = 0
+        self.power[env_ids] = 1
+        self.steps[env_ids] = 0
+
+        # A full board has nowhere to put food, so that game is over
+        full = occupied.all(axis=1)
+        if full.any():
+            self._end(env_ids[full], BOARD_FULL)
+
+    def _end(self, env_ids, reason):
+        self.alive[env_ids] = False
+        self.termination_codes[env_ids] = REASON_CODES[reason]
+
+    def get_states(self):
+        # Builds the same inputs as Snake.get_state_for_nn for every game at once
+        states = self.states
+        d = self.direction.astype(np.intp)
+        rows = np.arange(self.num_envs)
+        # Ahead, left, right relative to the current direction
+        for column in range(3):
+            relative = TURN_TABLE[d, column]
+            x = self.head_x + DIR_X[relative]
+            y = self.head_y + DIR_Y[relative]
+            inside = (x >= 0) & (x < GRID_WIDTH) & (y >= 0) & (y < GRID_HEIGHT)
+            cells = np.where(inside, y * GRID_WIDTH + x, 0)
+            states[:, column] = ~inside | self.occupancy[rows, cells]
+
+        states[:, 3] = self.food_y < self.head_y
+        states[:, 4] = self.food_y > self.head_y
+        states[:, 5] = self.food_x < self.head_x
+        states[:, 6] = self.food_x > self.head_x
+
+        states[:, 7:11] = ONE_HOT_TABLE[d]
+        if SENSOR_PACK == 'rays':
+            # Only games still running (a dead head may be off the board)
+            idx = np.flatnonzero(self.alive)
+            states[idx, BASIC_INPUTS:] = ray_sensors(self.occupancy[idx], self.head_y[idx] * GRID_WIDTH + self.head_x[idx],
+                                                     d[idx], self.food_y[idx] * GRID_WIDTH + self.food_x[idx])
+        return states
+
+    def step(self, actions):
+        # Advances every live game by one tick. actions: relative moves (0 straight, 1 left, 2 right)
+        idx = np.flatnonzero(self.alive)
+        if idx.size == 0:
+            return
+
+        # Force game over for snakes that went too long without food (or are stuck)
+        self.ticks += 1
+        self.moves_since_last_food[idx] += 1
+        if self.termination is None:
+            idx = self._end_where(idx, self.moves_since_last_food[idx] > self.max_moves_without_food, STARVATION)
+        else:
+            if self.ticks > self.termination.max_ticks:
+                self._end(idx, TICK_CAP)
+                return
+            budget = self.termination.starvation_budget(self.length[idx])
+            idx = self._end_where(idx, self.moves_since_last_food[idx] > budget, STARVATION)
+            if self.termination.detect_loops:
+                idx = self._end_where(idx, self._update_loop_detection(idx), LOOP)
+
+        # Snake.move: turn, step the head, drop the tail unless growing
+        direction = TURN_TABLE[self.direction[idx], np.asarray(actions)[idx]]
+        self.direction[idx] = direction
+        head_x = self.head_x[idx] + DIR_X[direction]
+        head_y = self.head_y[idx] + DIR_Y[direction]
+        self.head_x[idx] = head_x
+        self.head_y[idx] = head_y
+        self.lifespan[idx] += 1
+
+        growing = self.grow[idx]
+        shrinking = idx[~growing]
+        tail_slots = (self.head_ptr[shrinking] - self.length[shrinking] + 1) % self.capacity
+        tail_cells = self.body[shrinking, tail_slots]
+        self.occupancy[shrinking, tail_cells] = False
+        self.body_hash[shrinking] ^= CELL_KEYS[tail_cells]
+        grown = idx[growing]
+        self.length[grown] += 1
+        self.grow[grown] = False
+
+        # Snake.check_collision: walls, then its own body (the tail has already moved away)
+        inside = (head_x >= 0) & (head_x < GRID_WIDTH) & (head_y >= 0) & (head_y < GRID_HEIGHT)
+        cells = np.where(inside, head_y * GRID_WIDTH + head_x, 0)
+        hit = ~inside | self.occupancy[idx, cells]
+        self._end(idx[hit], COLLISION)
+
+        survivors = idx[~hit]
+        cells = cells[~hit]
+        self.head_ptr[survivors] = (self.head_ptr[survivors] + 1) % self.capacity
+        self.body[survivors, self.head_ptr[survivors]] = cells
+        self.occupancy[survivors, cells] = True
+        self.body_hash[survivors] ^= CELL_KEYS[cells]
+
+        # Food
+        ate = survivors[(self.head_x[survivors] == self.food_x[survivors]) &
+                        (self.head_y[survivors] == self.food_y[survivors])]
+        self.score[ate] += 1
+        self.grow[ate] = True
+        self._spawn_food(ate)
+
+    def _end_where(self, idx, mask, reason):
+        # Ends the games idx[mask] and returns the ones still running
+        if mask.any():
+            self._end(idx[mask], reason)
+            return idx[~mask]
+        return idx
+
+    def _update_loop_detection(self, idx):
+        # Vectorized termination.LoopDetector.update on (head, direction, body hash); True = looping
+        head_cells = self.head_y[idx] * GRID_WIDTH + self.head_x[idx]
+        keys = self.body_hash[idx] ^ HEAD_KEYS[head_cells] ^ DIRECTION_KEYS[self.direction[idx]]
+        looping = keys == self.saved_key[idx]
+        steps = self.steps[idx] + 1
+        checkpoint = steps == self.power[idx]
+        self.saved_key[idx[checkpoint]] = keys[checkpoint]
+        self.power[idx[checkpoint]] *= 2
+        steps[checkpoint] = 0
+        self.steps[idx] = steps
+        return looping
+
+    def get_termination_reasons(self):
+        # Why each game ended, as names from termination.TERMINATION_REASONS
+        return [TERMINATION_REASONS[code] for code in self.termination_codes]
+
+    def run(self, decide):
+        # decide(states, alive_ids) -> relative action per game; loops until every game is over
+        actions = np.zeros(self.num_envs, dtype=np.intp)
+        while self.alive.any():
+            alive_ids = np.flatnonzero(self.alive)
+            actions[alive_ids] = decide(self.get_states(), alive_ids)
+            self.step(actions)
+        return self.get_fitness()
+
+    def get_fitness(self):
+        # Same formula as Snake.get_fitness
+        return self.score * 100 + self.lifespan
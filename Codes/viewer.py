@@ -0,0 +1,158 @@
+# File: viewer.py
+
+# Watches many networks at once: every genome plays a headless game in one VectorSnakeEnv and
+# all boards are tiled into a single window. Frames are built as NumPy arrays from the
+# occupancy grids (a color per cell, scaled up) and written with one surfarray.blit_array,
+# so no per-segment drawing is needed no matter how many games or how long the snakes are.
+# Usage: python viewer.py [--checkpoint FILE | --population FILE] [--games N] [--cell-pixels P] [--fps FPS]
+#   Space pauses, r starts new games, up/down change the speed, q quits.
+
+import argparse
+import math
+import numpy as np
+from vector_env import VectorSnakeEnv
+from neural_network import PopulationNetwork
+from compiled_policy import compile_genomes, state_keys
+from termination import TerminationPolicy
+from config import (GRID_WIDTH, GRID_HEIGHT, BLACK, GREEN, BLUE, SENSOR_PACK, BEST_NN_FILE, CHECKPOINT_FILE,
+                    VIEWER_GAMES, VIEWER_CELL_PIXELS, VIEWER_FPS)
+
+# Cell codes -> colors. Dead games keep their last frame, dimmed (code + DEAD).
+EMPTY, BODY, HEAD, FOOD, BORDER = 0, 1, 2, 3, 4
+DEAD = 5
+PALETTE = np.array([BLACK, (0, 160, 0), GREEN, BLUE, (60, 60, 60),
+                    (0, 0, 0), (45, 45, 45), (90, 90, 90), (20, 40, 70)], dtype=np.uint8)
+TILE_GAP = 1 # Border pixels between boards
+
+
+class GenerationViewer:
+    # Plays one game per genome (rows of a (P, G) matrix) and renders them as a grid of boards
+    def __init__(self, genomes, cell_pixels=VIEWER_CELL_PIXELS, columns=None, termination=None, rng=None):
+        self.genomes = genomes
+        self.num_games = len(genomes)
+        self.cell_pixels = cell_pixels
+        self.columns = columns or math.ceil(math.sqrt(self.num_games))
+        self.rows = math.ceil(self.num_games / self.columns)
+        self.tile_width = GRID_WIDTH * cell_pixels + TILE_GAP
+        self.tile_height = GRID_HEIGHT * cell_pixels + TILE_GAP
+        self.size = (self.columns * self.tile_width, self.rows * self.tile_height)
+        self.termination = termination if termination is not None else TerminationPolicy()
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+        self.networks = PopulationNetwork.from_genomes(genomes)
+        # With the 'basic' sensors every network is compiled into its decision table once (compiled_policy.py)
+        self.tables = compile_genomes(self.networks) if SENSOR_PACK == 'basic' else None
+        self.env_rows = np.arange(self.num_games)
+        self.restart()
+
+    @classmethod
+    def from_manager(cls, ga_manager, **kwargs):
+        # The GeneticAlgorithmManager's current population (a copy, so training can go on)
+        return cls(ga_manager.genomes.copy(), **kwargs)
+
+    def restart(self):
+        self.env = VectorSnakeEnv(self.num_games, rng=self.rng, termination=self.termination)
+        self.actions = np.zeros(self.num_games, dtype=np.intp)
+
+    @property
+    def finished(self):
+        return not self.env.alive.any()
+
+    def step(self):
+        env = self.env
+        alive_ids = np.flatnonzero(env.alive)
+        if alive_ids.size == 0:
+            return
+        states = env.get_states()
+        if self.tables is not None:
+            self.actions[alive_ids] = self.tables[alive_ids, state_keys(states[alive_ids])]
+        else:
+            self.actions[alive_ids] = np.argmax(self.networks.forward(states[alive_ids], alive_ids), axis=1)
+        env.step(self.actions)
+
+    def frame(self):
+        # (width, height, 3) RGB array of every board, laid out for surfarray (x first)
+        env = self.env
+        codes = env.occupancy.astype(np.uint8) # BODY where occupied
+        alive = env.alive
+        live = self.env_rows[alive]
+        codes[live, env.head_y[live] * GRID_WIDTH + env.head_x[live]] = HEAD
+        codes[self.env_rows, env.food_y * GRID_WIDTH + env.food_x] = FOOD
+        codes[~alive] += DEAD
+
+        # Scale every cell up to cell_pixels x cell_pixels and add the gap on the right and bottom
+        p = self.cell_pixels
+        tiles = np.full((self.rows * self.columns, self.tile_height, self.tile_width), BORDER, dtype=np.uint8)
+        boards = codes.reshape(self.num_games, GRID_HEIGHT, 1, GRID_WIDTH, 1)
+        tiles[:self.num_games, :-TILE_GAP, :-TILE_GAP] = np.broadcast_to(
+            boards, (self.num_games, GRID_HEIGHT, p, GRID_WIDTH, p)).reshape(self.num_games, GRID_HEIGHT * p, GRID_WIDTH * p)
+        # (rows, columns, y, x) -> (x, y) over the whole window
+        image = tiles.reshape(self.rows, self.columns, self.tile_height, self.tile_width)
+        image = image.transpose(1, 3, 0, 2).reshape(self.size)
+        return PALETTE[image]
+
+    def play(self, fps=VIEWER_FPS, caption='Population'):
+        # Window loop; new games start automatically once every game has ended
+        import pygame
+        pygame.init()
+        screen = pygame.display.set_mode(self.size)
+        clock = pygame.time.Clock()
+        paused = False
+        try:
+            while True:
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        return
+                    if event.type == pygame.KEYDOWN:
+                        if event.key in (pygame.K_q, pygame.K_ESCAPE):
+                            return
+                        if event.key == pygame.K_SPACE:
+                            paused = not paused
+                        elif event.key == pygame.K_r:
+                            self.restart()
+                        elif event.key == pygame.K_UP:
+                            fps = min(fps * 2, 960)
+                        elif event.key == pygame.K_DOWN:
+                            fps = max(fps // 2, 1)
+                if not paused:
+                    if self.finished:
+                        self.restart()
+                    self.step()
+                pygame.surfarray.blit_array(screen, self.frame())
+                pygame.display.flip()
+                pygame.display.set_caption(f"{caption} - {int(self.env.alive.sum())}/{self.num_games} alive - "
+                                           f"best score {int(self.env.score.max())} - {fps} fps")
+                clock.tick(fps)
+        finally:
+            pygame.quit()
+
+
+def load_population(args):
+    if args.checkpoint:
+        from checkpoint import read_checkpoint
+        genomes, _ = read_checkpoint(args.checkpoint)
+    else:
+        from model_io import load_genomes
+        genomes, _ = load_genomes(args.population, mmap=False)
+    # Repeat the networks until there are enough games (a single best network plays several games)
+    games = args.games or (VIEWER_GAMES if len(genomes) == 1 else len(genomes))
+    return np.resize(np.asarray(genomes), (games, genomes.shape[1]))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Watch a whole population play, one tile per game.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--checkpoint', default=None, help=f"GA checkpoint to watch (e.g. {CHECKPOINT_FILE})")
+    source.add_argument('--population', default=BEST_NN_FILE, help="model file with one or more networks (default: %(default)s)")
+    parser.add_argument('--games', type=int, default=None,
+                        help=f"number of games (default: one per network, {VIEWER_GAMES} for a single network)")
+    parser.add_argument('--cell-pixels', type=int, default=VIEWER_CELL_PIXELS, help="pixels per cell (default: %(default)s)")
+    parser.add_argument('--fps', type=int, default=VIEWER_FPS, help="default: %(default)s")
+    parser.add_argument('--seed', type=int, default=None, help="random seed (default: random)")
+    args = parser.parse_args(argv)
+
+    genomes = load_population(args)
+    viewer = GenerationViewer(genomes, cell_pixels=args.cell_pixels, rng=np.random.default_rng(args.seed))
+    viewer.play(args.fps)
+
+if __name__ == "__main__":
+    main()